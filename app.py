@@ -1,7 +1,6 @@
-import json
 import os
+import time
 import uuid
-from collections import deque
 from pathlib import Path
 
 import streamlit as st
@@ -19,27 +18,69 @@ if "GOOGLE_API_KEY" not in os.environ:
 
     load_dotenv(Path(__file__).parent / "maintenance_agent" / ".env")
 
-# --- Agent / Runner 초기화 (import 전에 환경 변수 설정 필요) ---
-from google.adk.agents.run_config import RunConfig, StreamingMode
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
+# google.adk / google.genai와 agent 모듈은 무거우므로 백그라운드 워밍업 스레드가 import합니다.
+# 사이드바·안내 화면은 이 import와 DB 초기화를 기다리지 않고 바로 렌더링됩니다.
+from maintenance_agent.db import DEFAULT_PROPERTY, ensure_db, list_properties
+from maintenance_agent.startup import APP_NAME, get_runner, record_ttft, start_warmup
+from maintenance_agent.tools import PROPERTY_STATE_KEY
+from maintenance_agent.turn_view import TurnView, render_tool
 
-from maintenance_agent.agent import root_agent
+# 프로세스당 한 번: Runner·모델 클라이언트 생성과 모델 API 연결을 첫 턴 전에 끝내 둡니다.
+start_warmup()
 
-
-APP_NAME = "maintenance_agent"
 USER_ID = "streamlit_user"
 
+TURN_BUDGET_S = float(os.environ.get("KPM_TURN_BUDGET_S", "90"))
+HEDGE_AFTER_S = (
+    float(os.environ["KPM_HEDGE_AFTER_S"]) if os.environ.get("KPM_HEDGE_AFTER_S") else None
+)
+# 녹화: 턴마다 이벤트 스트림을 픽스처로 저장 / 재생: 모델 대신 픽스처 이벤트를 재생
+RECORD_DIR = os.environ.get("KPM_RECORD_DIR")
+REPLAY_PATH = os.environ.get("KPM_REPLAY_PATH")
+REPLAY_SPEED = float(os.environ.get("KPM_REPLAY_SPEED", "1"))
+
+
+async def ensure_session(runner, session_id: str, property_id: str):
+    """세션이 없으면 건물 ID를 상태에 담아 생성합니다. 툴은 이 값으로 건물 DB를 고릅니다."""
+    service = runner.session_service
+    session = await service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
+    if session is None:
+        await service.create_session(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            session_id=session_id,
+            state={PROPERTY_STATE_KEY: property_id},
+        )
+
+
+async def count_session_events(runner, session_id: str) -> int:
+    """세션에 누적된 이벤트 수를 반환합니다. 세션이 없으면 0."""
+    session = await runner.session_service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
+    return len(session.events) if session else 0
+
+
+async def fork_session(runner, session_id: str, upto: int) -> str:
+    """세션의 처음 upto개 이벤트를 복제한 새 세션을 만들고 id를 반환합니다.
 
-@st.cache_resource
-def get_runner():
-    return Runner(
+    재시도/헤징 시도는 이번 턴 이전 상태에서 출발해야 사용자 메시지가 중복되지 않습니다.
+    """
+    service = runner.session_service
+    source = await service.get_session(
+        app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
+    # 건물 ID 등 세션 생성 시 넣은 상태는 이벤트에 없으므로 함께 복사합니다.
+    forked = await service.create_session(
         app_name=APP_NAME,
-        agent=root_agent,
-        session_service=InMemorySessionService(),
-        auto_create_session=True,
+        user_id=USER_ID,
+        state=dict(source.state) if source else None,
     )
+    for event in source.events[:upto] if source else []:
+        await service.append_event(forked, event)
+    return forked.id
 
 
 def reset_conversation():
@@ -48,23 +89,6 @@ def reset_conversation():
     st.session_state.session_id = str(uuid.uuid4())
 
 
-def render_tool(tool: dict):
-    """툴 호출/응답을 st.status로 렌더링합니다."""
-    with st.status(f"🔧 {tool['name']}", state="complete"):
-        if tool["args"]:
-            st.code(
-                json.dumps(tool["args"], ensure_ascii=False, indent=2),
-                language="json",
-            )
-        if tool["response"]:
-            st.divider()
-            st.caption("결과")
-            st.code(
-                json.dumps(tool["response"], ensure_ascii=False, indent=2),
-                language="json",
-            )
-
-
 def render_assistant_message(msg: dict):
     """히스토리 재생용: assistant 메시지를 시간순으로 렌더링합니다."""
     if "parts" in msg:
@@ -73,7 +97,7 @@ def render_assistant_message(msg: dict):
                 with st.status("💭 사고 과정", state="complete"):
                     st.markdown(part["text"])
             elif part["type"] == "tool":
-                render_tool(part)
+                render_tool(st, part)
             elif part["type"] == "text":
                 st.markdown(part["text"])
     else:
@@ -82,7 +106,7 @@ def render_assistant_message(msg: dict):
             with st.status("💭 사고 과정", state="complete"):
                 st.markdown(msg["thinking"])
         for tool in msg.get("tool_interactions", []):
-            render_tool(tool)
+            render_tool(st, tool)
         if msg.get("content"):
             st.markdown(msg["content"])
 
@@ -118,6 +142,12 @@ with st.sidebar:
         "- AI 사고 과정 실시간 표시"
     )
 
+    properties = list_properties()
+    if len(properties) > 1:
+        st.divider()
+        # 건물을 바꾸면 다른 건물 DB를 쓰는 새 세션으로 시작합니다.
+        st.selectbox("건물", properties, key="property_id", on_change=reset_conversation)
+
     st.divider()
     if st.button("대화 초기화", use_container_width=True):
         reset_conversation()
@@ -128,6 +158,8 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
+if "property_id" not in st.session_state:
+    st.session_state.property_id = DEFAULT_PROPERTY
 
 # --- 채팅 히스토리 렌더링 ---
 for msg in st.session_state.messages:
@@ -164,115 +196,97 @@ if not st.session_state.messages and not prompt:
 
 # --- 사용자 입력 처리 (스트리밍) ---
 if prompt:
+    prompt_at = time.monotonic()
     st.session_state.messages.append({"role": "user", "content": prompt})
 
     with st.chat_message("user"):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        runner = get_runner()
-        content = types.Content(
-            role="user",
-            parts=[types.Part(text=prompt)],
-        )
+        view = TurnView(st)
+        recorder = None
+        if REPLAY_PATH:
+            from maintenance_agent.replay import load_fixture, replay_events
 
-        parts = []
-        thinking_status = None
-        thinking_md = None
-        thinking_text = ""
-        text_el = None
-        text_content = ""
-        pending_calls = deque()
+            for event in replay_events(load_fixture(REPLAY_PATH), REPLAY_SPEED):
+                view.handle(event)
+        else:
+            from google.adk.agents.run_config import RunConfig, StreamingMode
+            from google.genai import types
+
+            from maintenance_agent.replay import SessionRecorder
+            from maintenance_agent.turn_budget import (
+                BudgetedTurn,
+                TurnPolicy,
+                fallback_message,
+                run_coroutine,
+            )
 
-        run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+            ensure_db(st.session_state.property_id)
+            runner = get_runner()
+            content = types.Content(
+                role="user",
+                parts=[types.Part(text=prompt)],
+            )
 
-        for event in runner.run(
-            user_id=USER_ID,
-            session_id=st.session_state.session_id,
-            new_message=content,
-            run_config=run_config,
-        ):
-            if not event.content or not event.content.parts:
-                continue
-
-            is_partial = getattr(event, "partial", False)
-
-            for part in event.content.parts:
-                if getattr(part, "thought", False) and part.text and is_partial:
-                    # --- Thinking 스트리밍 ---
-                    if text_el is not None:
-                        parts.append({"type": "text", "text": text_content})
-                        text_el = None
-                        text_content = ""
-                    if thinking_md is None:
-                        thinking_status = st.status("사고 중...", expanded=True)
-                        thinking_md = thinking_status.empty()
-                        thinking_text = ""
-                    thinking_text += part.text
-                    thinking_md.markdown(thinking_text)
-
-                elif part.function_call and not is_partial:
-                    # --- 툴 호출 ---
-                    if thinking_status is not None:
-                        thinking_status.update(
-                            label="💭 사고 과정", state="complete", expanded=False
-                        )
-                        if thinking_text:
-                            parts.append({"type": "thinking", "text": thinking_text})
-                        thinking_status = None
-                        thinking_md = None
-                        thinking_text = ""
-                    if text_el is not None:
-                        parts.append({"type": "text", "text": text_content})
-                        text_el = None
-                        text_content = ""
-                    pending_calls.append(part.function_call)
-
-                elif part.function_response and not is_partial:
-                    # --- 툴 응답 ---
-                    fr = part.function_response
-                    matched_call = pending_calls.popleft() if pending_calls else None
-                    call_name = matched_call.name if matched_call else fr.name
-                    call_args = (
-                        dict(matched_call.args)
-                        if matched_call and matched_call.args
-                        else {}
+            run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+            base_session_id = st.session_state.session_id
+            run_coroutine(
+                ensure_session(runner, base_session_id, st.session_state.property_id)
+            )
+            base_event_count = run_coroutine(count_session_events(runner, base_session_id))
+            attempt_sessions = {}
+
+            async def attempt_stream(index: int):
+                session_id = base_session_id
+                if index > 0:
+                    session_id = await fork_session(
+                        runner, base_session_id, base_event_count
                     )
-                    response_data = dict(fr.response) if fr.response else {}
-                    tool_data = {
-                        "type": "tool",
-                        "name": call_name,
-                        "args": call_args,
-                        "response": response_data,
-                    }
-                    parts.append(tool_data)
-                    render_tool(tool_data)
-
-                elif part.text and not getattr(part, "thought", False) and is_partial:
-                    # --- 응답 텍스트 스트리밍 ---
-                    if thinking_status is not None:
-                        thinking_status.update(
-                            label="💭 사고 과정", state="complete", expanded=False
-                        )
-                        if thinking_text:
-                            parts.append({"type": "thinking", "text": thinking_text})
-                        thinking_status = None
-                        thinking_md = None
-                        thinking_text = ""
-                    if text_el is None:
-                        text_el = st.empty()
-                    text_content += part.text
-                    text_el.markdown(text_content)
-
-        # --- 루프 종료: 미완료 페이즈 정리 ---
-        if thinking_status is not None:
-            thinking_status.update(
-                label="💭 사고 과정", state="complete", expanded=False
+                attempt_sessions[index] = session_id
+                async for event in runner.run_async(
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=content,
+                    run_config=run_config,
+                ):
+                    yield event
+
+            turn = BudgetedTurn(
+                attempt_stream,
+                TurnPolicy(turn_budget_s=TURN_BUDGET_S, hedge_after_s=HEDGE_AFTER_S),
             )
-            if thinking_text:
-                parts.append({"type": "thinking", "text": thinking_text})
-        if text_content:
-            parts.append({"type": "text", "text": text_content})
+            if RECORD_DIR:
+                recorder = SessionRecorder(prompt)
+            # 첫 턴의 TTFT에는 워밍업이 끝나지 않았을 때의 Runner 생성 대기도 포함합니다.
+            setup_s = time.monotonic() - prompt_at
+            events = iter(turn)
+            while True:
+                try:
+                    event = next(events)
+                except StopIteration:
+                    break
+                except Exception as exc:
+                    # 예산 소진·일시 오류: 기술적 에러 대신 폴백 안내 (툴 실행 중이었으면 반영 여부 확인 안내)
+                    view.fail(fallback_message(exc))
+                    recorder = None  # 폴백으로 끝난 턴은 재생해도 같은 parts가 나오지 않음
+                    break
+                if recorder is not None:
+                    recorder.add(event)
+                view.handle(event)
+
+            if turn.ttft_s is not None:
+                record_ttft(setup_s + turn.ttft_s)
+            if turn.winner is not None:
+                st.session_state.session_id = attempt_sessions[turn.winner]
+            else:
+                # 채택된 시도가 없으면 이번 턴 이전 상태로 되돌린 세션에서 이어갑니다.
+                st.session_state.session_id = run_coroutine(
+                    fork_session(runner, base_session_id, base_event_count)
+                )
+        parts = view.finish()
+        if recorder is not None:
+            recorder.save(RECORD_DIR, parts)
 
     st.session_state.messages.append({"role": "assistant", "parts": parts})
     st.rerun()
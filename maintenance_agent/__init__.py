@@ -1 +1,9 @@
-from . import agent
+import importlib
+
+
+def __getattr__(name):
+    # ADK 로더와 `maintenance_agent.agent` 접근 시에만 agent(google.adk 포함)를 import합니다.
+    # db·tools만 쓰는 운영 도구와 앱 첫 화면은 ADK import 비용을 내지 않습니다.
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
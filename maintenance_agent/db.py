@@ -1,8 +1,19 @@
+# json·logging은 첫 화면 전 import 예산(startup.STARTUP_BUDGET_MS) 때문에 쓰는 함수 안에서 가져옵니다.
+import os
+import re
 import sqlite3
+import threading
+import unicodedata
 from datetime import date, timedelta
 from pathlib import Path
 
+# 건물(property)별로 DB 파일을 나눠 기사 팀·슬롯·쓰기 락을 분리합니다.
+# 기본 건물은 기존 DB_PATH를 그대로 쓰고, 나머지는 SHARD_DIR/<property_id>.db에 저장합니다.
+DEFAULT_PROPERTY = "default"
 DB_PATH = Path(__file__).parent / "maintenance.db"
+ARCHIVE_DB_PATH = Path(__file__).parent / "maintenance_archive.db"
+SHARD_DIR = Path(__file__).parent / "shards"
+_PROPERTY_ID = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
 
 TIME_SLOTS = [
     "오전 10시",
@@ -13,16 +24,126 @@ TIME_SLOTS = [
     "오후 4시",
 ]
 
+# available_slots.is_available 값: 1 예약 가능, 0 예약됨, -1 휴무(기사 부재 등으로 닫힌 슬롯)
 
-def get_connection():
-    """SQLite DB 커넥션을 반환합니다."""
-    return sqlite3.connect(DB_PATH)
+# 임차인이 고른 슬롯을 예약 확인 동안 다른 세션이 가져가지 못하게 잡아두는 시간(초)
+HOLD_TTL_SECONDS = 300
 
+# 다른 세션의 만료되지 않은 가점유가 있는 슬롯을 거르는 조건. available_slots 별칭은 s입니다.
+HELD_BY_OTHERS = (
+    "EXISTS (SELECT 1 FROM slot_holds h WHERE h.date = s.date AND h.time_slot = s.time_slot "
+    "AND h.hold_id IS NOT ? AND h.expires_at > strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))"
+)
 
-def init_db():
+# 동일 주소·유형의 진행 중 예약을 중복으로 보는 기준 (희망 날짜 전후 일수)
+DUPLICATE_WINDOW_DAYS = 7
+
+_ADDRESS_ALIASES = [
+    (re.compile(r"^서울(특별)?시?"), "서울"),
+    (re.compile(r"^부산(광역)?시?"), "부산"),
+    (re.compile(r"^인천(광역)?시?"), "인천"),
+    (re.compile(r"^경기도?"), "경기"),
+]
+_ADDRESS_NOISE = re.compile(r"[\s,.\-()·]+")
+
+
+def _check_property(property_id: str):
+    if not _PROPERTY_ID.fullmatch(property_id):
+        raise ValueError(f"잘못된 property_id입니다: {property_id!r}")
+
+
+def db_path(property_id: str = DEFAULT_PROPERTY) -> Path:
+    """건물의 스케줄 DB 경로를 반환합니다."""
+    if property_id == DEFAULT_PROPERTY:
+        return DB_PATH
+    _check_property(property_id)
+    return SHARD_DIR / f"{property_id}.db"
+
+
+def archive_path(property_id: str = DEFAULT_PROPERTY) -> Path:
+    """건물의 아카이브 DB 경로를 반환합니다."""
+    if property_id == DEFAULT_PROPERTY:
+        return ARCHIVE_DB_PATH
+    _check_property(property_id)
+    return SHARD_DIR / f"{property_id}_archive.db"
+
+
+def list_properties() -> list[str]:
+    """기본 건물, KPM_PROPERTIES(쉼표 구분)에 등록된 건물, DB 파일이 있는 건물을 반환합니다.
+
+    형식에 맞지 않는 건물 ID는 경고를 남기고 건너뜁니다. 설정 오타 하나로 채팅 앱 사이드바가
+    매번 실패하지 않게 하기 위해서입니다.
+    """
+    properties = set()
+    properties.update(
+        p.strip() for p in os.environ.get("KPM_PROPERTIES", "").split(",") if p.strip()
+    )
+    if SHARD_DIR.exists():
+        properties.update(
+            path.stem for path in SHARD_DIR.glob("*.db") if not path.stem.endswith("_archive")
+        )
+    properties.discard(DEFAULT_PROPERTY)
+    invalid = {p for p in properties if not _PROPERTY_ID.fullmatch(p)}
+    if invalid:
+        import logging
+
+        logger = logging.getLogger(__name__)
+    for property_id in sorted(invalid):
+        logger.warning("잘못된 property_id를 건너뜁니다: %r", property_id)
+    return [DEFAULT_PROPERTY] + sorted(properties - invalid)
+
+
+def fan_out(fn, properties: list[str] | None = None, max_workers: int = 8) -> dict:
+    """fn(property_id)를 건물별로 병렬 실행하고 {property_id: 결과}를 반환합니다.
+
+    properties를 생략하면 DB 파일이 있는 건물 전체가 대상입니다. 건물마다 DB 파일이 달라
+    락을 공유하지 않고, sqlite3는 쿼리 중 GIL을 놓으므로 스레드로 충분합니다.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if properties is None:
+        properties = [p for p in list_properties() if db_path(p).exists()]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(properties)))) as pool:
+        return dict(zip(properties, pool.map(fn, properties)))
+
+
+def get_connection(property_id: str = DEFAULT_PROPERTY):
+    """건물의 SQLite DB 커넥션을 반환합니다."""
+    path = db_path(property_id)
+    if property_id != DEFAULT_PROPERTY:
+        path.parent.mkdir(exist_ok=True)
+    return sqlite3.connect(path)
+
+
+def init_db(property_id: str = DEFAULT_PROPERTY):
     """DB 초기화: 테이블 생성 및 향후 7일치 슬롯 시딩."""
-    conn = get_connection()
+    conn = get_connection(property_id)
+    create_schema(conn)
+    _seed_slots(conn)
+    conn.close()
+
+
+_initialized_properties: set[str] = set()
+_init_lock = threading.Lock()
 
+
+def ensure_db(property_id: str = DEFAULT_PROPERTY):
+    """프로세스 시작 훅: 건물별로 프로세스당 1회만 init_db를 실행합니다.
+
+    이후 호출은 집합 조회만 하므로 요청 경로에서 매번 불러도 됩니다.
+    """
+    if property_id in _initialized_properties:
+        return
+    with _init_lock:
+        if property_id not in _initialized_properties:
+            init_db(property_id)
+            _initialized_properties.add(property_id)
+
+
+def create_schema(conn):
+    """테이블·인덱스·트리거를 생성합니다. 이미 존재하는 객체는 건드리지 않습니다."""
+    # 새 DB만 적용됩니다. 기존 DB는 retention 작업이 최초 1회 VACUUM으로 전환합니다.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS available_slots (
@@ -45,13 +166,313 @@ def init_db():
             issue_type TEXT NOT NULL,
             issue_description TEXT NOT NULL,
             email TEXT,
-            status TEXT NOT NULL DEFAULT 'scheduled'
+            status TEXT NOT NULL DEFAULT 'scheduled',
+            address_norm TEXT
         )
     """
     )
+    _migrate_address_norm(conn)
+    _migrate_email_case(conn)
 
-    _seed_slots(conn)
-    conn.close()
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_repairs_email ON repairs (email)")
+    # 원문 주소 완전 일치 인덱스는 표기가 다르면 찾지 못하므로 정규화 주소 인덱스로 대체합니다.
+    conn.execute("DROP INDEX IF EXISTS idx_repairs_address_status")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_repairs_tenant ON repairs (address_norm, email, status)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_repairs_date_slot ON repairs (date, time_slot)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_repairs_duplicate "
+        "ON repairs (address_norm, issue_type, status, date)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_repairs_date_status ON repairs (date, status)"
+    )
+
+    # 변경 피드: seq는 AUTOINCREMENT라 삭제 후에도 재사용되지 않아 커서가 단조 증가합니다.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS repair_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        )
+    """
+    )
+
+    # 일괄 작업이 트랜잭션 안에서 쌓아두고 커밋 후 발송하는 알림 대기열
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            notification_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            sent_at TEXT
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_outbox_status ON notification_outbox (status, id)"
+    )
+
+    # 방문 일시별 리마인더 발송 기록. 일정이 바뀌면 새 일시로 다시 발송합니다.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS reminder_log (
+            ticket_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            status TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            PRIMARY KEY (ticket_id, date, time_slot)
+        )
+    """
+    )
+
+    # 예약 확인 중인 슬롯의 가점유. 만료된 행은 조회 조건에서 무시되고 sweep_expired_holds가 지웁니다.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS slot_holds (
+            date TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            hold_id TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            PRIMARY KEY (date, time_slot)
+        )
+    """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_slot_holds_expires ON slot_holds (expires_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_slot_holds_hold_id ON slot_holds (hold_id)")
+
+    _create_search_index(conn)
+    _create_summary_tables(conn)
+    conn.commit()
+
+
+FTS_TRIGGERS = {
+    "repairs_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS repairs_fts_insert AFTER INSERT ON repairs BEGIN
+            INSERT INTO repairs_fts (rowid, issue_description)
+            VALUES (new.rowid, new.issue_description);
+        END
+    """,
+    "repairs_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS repairs_fts_delete AFTER DELETE ON repairs BEGIN
+            INSERT INTO repairs_fts (repairs_fts, rowid, issue_description)
+            VALUES ('delete', old.rowid, old.issue_description);
+        END
+    """,
+    "repairs_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS repairs_fts_update
+        AFTER UPDATE OF issue_description ON repairs BEGIN
+            INSERT INTO repairs_fts (repairs_fts, rowid, issue_description)
+            VALUES ('delete', old.rowid, old.issue_description);
+            INSERT INTO repairs_fts (rowid, issue_description)
+            VALUES (new.rowid, new.issue_description);
+        END
+    """,
+}
+
+
+def _create_search_index(conn):
+    """issue_description 전문 검색용 FTS5(trigram) 테이블과 동기화 트리거를 생성합니다.
+
+    repairs를 content 테이블로 쓰는 external-content 인덱스이므로 본문은 중복 저장하지 않습니다.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'repairs_fts'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS repairs_fts USING fts5(
+            issue_description,
+            content = 'repairs',
+            content_rowid = 'rowid',
+            tokenize = 'trigram'
+        )
+    """
+    )
+    for trigger in FTS_TRIGGERS.values():
+        conn.execute(trigger)
+    if not exists:
+        conn.execute("INSERT INTO repairs_fts (repairs_fts) VALUES ('rebuild')")
+
+
+SUMMARY_TRIGGERS = {
+    "daily_bookings_insert": """
+        CREATE TRIGGER IF NOT EXISTS daily_bookings_insert AFTER INSERT ON repairs BEGIN
+            INSERT INTO daily_bookings (date, issue_type, booked, cancelled)
+            VALUES (new.date, new.issue_type, 1, new.status = 'cancelled')
+            ON CONFLICT (date, issue_type) DO UPDATE SET
+                booked = booked + 1, cancelled = cancelled + excluded.cancelled;
+        END
+    """,
+    "daily_bookings_update": """
+        CREATE TRIGGER IF NOT EXISTS daily_bookings_update
+        AFTER UPDATE OF date, issue_type, status ON repairs
+        WHEN old.date IS NOT new.date
+            OR old.issue_type IS NOT new.issue_type
+            OR old.status IS NOT new.status
+        BEGIN
+            UPDATE daily_bookings
+            SET booked = booked - 1, cancelled = cancelled - (old.status = 'cancelled')
+            WHERE date = old.date AND issue_type = old.issue_type;
+            INSERT INTO daily_bookings (date, issue_type, booked, cancelled)
+            VALUES (new.date, new.issue_type, 1, new.status = 'cancelled')
+            ON CONFLICT (date, issue_type) DO UPDATE SET
+                booked = booked + 1, cancelled = cancelled + excluded.cancelled;
+        END
+    """,
+    "daily_slot_usage_insert": """
+        CREATE TRIGGER IF NOT EXISTS daily_slot_usage_insert
+        AFTER INSERT ON available_slots BEGIN
+            INSERT INTO daily_slot_usage (date, total_slots, booked_slots)
+            VALUES (new.date, new.is_available != -1, new.is_available = 0)
+            ON CONFLICT (date) DO UPDATE SET
+                total_slots = total_slots + excluded.total_slots,
+                booked_slots = booked_slots + excluded.booked_slots;
+        END
+    """,
+    "daily_slot_usage_update": """
+        CREATE TRIGGER IF NOT EXISTS daily_slot_usage_update
+        AFTER UPDATE OF is_available ON available_slots
+        WHEN old.is_available IS NOT new.is_available
+        BEGIN
+            UPDATE daily_slot_usage
+            SET total_slots = total_slots + (new.is_available != -1) - (old.is_available != -1),
+                booked_slots = booked_slots + (new.is_available = 0) - (old.is_available = 0)
+            WHERE date = new.date;
+        END
+    """,
+}
+
+SUMMARY_SOURCES = {
+    "daily_bookings": """
+        SELECT date, issue_type, COUNT(*) AS booked, SUM(status = 'cancelled') AS cancelled
+        FROM {repairs} GROUP BY date, issue_type
+    """,
+    "daily_slot_usage": """
+        SELECT date, SUM(is_available != -1) AS total_slots, SUM(is_available = 0) AS booked_slots
+        FROM {slots} GROUP BY date
+    """,
+}
+
+
+def _create_summary_tables(conn):
+    """운영 대시보드용 집계 테이블과 증분 갱신 트리거를 생성합니다.
+
+    예약·취소·슬롯 변경과 같은 트랜잭션에서 트리거로 갱신됩니다. 아카이브 이동(DELETE)은
+    집계에 반영하지 않으므로 지난 날짜의 통계는 보존 기간이 지나도 남습니다.
+    휴무 슬롯은 total_slots(가용 용량)에서 제외됩니다.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_bookings'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_bookings (
+            date TEXT NOT NULL,
+            issue_type TEXT NOT NULL,
+            booked INTEGER NOT NULL DEFAULT 0,
+            cancelled INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, issue_type)
+        ) WITHOUT ROWID
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_slot_usage (
+            date TEXT PRIMARY KEY,
+            total_slots INTEGER NOT NULL DEFAULT 0,
+            booked_slots INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """
+    )
+    stale = _drop_legacy_slot_usage_triggers(conn)
+    for trigger in SUMMARY_TRIGGERS.values():
+        conn.execute(trigger)
+    if not exists or stale:
+        rebuild_summaries(conn)
+
+
+def _drop_legacy_slot_usage_triggers(conn) -> bool:
+    """휴무 상태(-1)를 모르는 이전 슬롯 집계 트리거를 제거합니다. 제거했으면 True."""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+        "AND name = 'daily_slot_usage_update'"
+    ).fetchone()
+    if not row or "!= -1" in row[0]:
+        return False
+    conn.execute("DROP TRIGGER daily_slot_usage_insert")
+    conn.execute("DROP TRIGGER daily_slot_usage_update")
+    return True
+
+
+def rebuild_summaries(conn, repairs: str = "repairs", slots: str = "available_slots"):
+    """집계 테이블을 원본 테이블(또는 repairs/slots로 지정한 서브쿼리)에서 다시 계산합니다."""
+    conn.execute("DELETE FROM daily_bookings")
+    conn.execute(
+        "INSERT INTO daily_bookings (date, issue_type, booked, cancelled) "
+        + SUMMARY_SOURCES["daily_bookings"].format(repairs=repairs)
+    )
+    conn.execute("DELETE FROM daily_slot_usage")
+    conn.execute(
+        "INSERT INTO daily_slot_usage (date, total_slots, booked_slots) "
+        + SUMMARY_SOURCES["daily_slot_usage"].format(slots=slots)
+    )
+
+
+def _migrate_address_norm(conn):
+    """address_norm 컬럼이 없는 기존 DB에 컬럼을 추가하고 값을 채웁니다."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(repairs)")}
+    if "address_norm" in columns:
+        return
+    conn.execute("ALTER TABLE repairs ADD COLUMN address_norm TEXT")
+    rows = conn.execute("SELECT ticket_id, address FROM repairs").fetchall()
+    conn.executemany(
+        "UPDATE repairs SET address_norm = ? WHERE ticket_id = ?",
+        [(normalize_address(address), ticket_id) for ticket_id, address in rows],
+    )
+    conn.commit()
+
+
+def _migrate_email_case(conn):
+    """대소문자·공백을 정규화하기 전에 저장된 이메일을 한 번만 정규화합니다(user_version 1)."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+        return
+    rows = conn.execute("SELECT ticket_id, email FROM repairs WHERE email IS NOT NULL").fetchall()
+    conn.executemany(
+        "UPDATE repairs SET email = ? WHERE ticket_id = ?",
+        [
+            (normalize_email(email), ticket_id)
+            for ticket_id, email in rows
+            if normalize_email(email) != email
+        ],
+    )
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+
+def normalize_email(email: str | None) -> str | None:
+    """조회·저장용 이메일 정규화: 앞뒤 공백 제거, 소문자 변환. 빈 값은 None으로 저장합니다."""
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_address(address: str) -> str:
+    """중복 판별용 주소 정규화: 유니코드 정규화, 시·도 표기 통일, 공백·구두점 제거."""
+    normalized = unicodedata.normalize("NFKC", address).strip().lower()
+    for pattern, replacement in _ADDRESS_ALIASES:
+        normalized = pattern.sub(replacement, normalized, count=1)
+    return _ADDRESS_NOISE.sub("", normalized)
 
 
 def _seed_slots(conn):
@@ -67,57 +488,166 @@ def _seed_slots(conn):
     conn.commit()
 
 
-def get_available_slots(target_date: str) -> list[str]:
-    """특정 날짜의 빈 시간대 목록을 반환합니다."""
-    conn = get_connection()
+def get_available_slots(
+    target_date: str,
+    hold_id: str | None = None,
+    property_id: str = DEFAULT_PROPERTY,
+) -> list[str]:
+    """특정 날짜의 빈 시간대 목록을 반환합니다. 다른 세션이 가점유 중인 슬롯은 제외합니다."""
+    conn = get_connection(property_id)
     _seed_slots(conn)
     cursor = conn.execute(
-        "SELECT time_slot FROM available_slots WHERE date = ? AND is_available = 1 ORDER BY time_slot",
-        (target_date,),
+        "SELECT time_slot FROM available_slots s WHERE date = ? AND is_available = 1 "
+        f"AND NOT {HELD_BY_OTHERS} ORDER BY time_slot",
+        (target_date, hold_id),
     )
     slots = [row[0] for row in cursor.fetchall()]
     conn.close()
     return slots
 
 
-def book_slot(target_date: str, time_slot: str) -> bool:
-    """시간대를 예약합니다. 성공 시 True, 이미 예약된 경우 False."""
-    conn = get_connection()
+def get_booked_addresses(
+    target_date: str,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict[str, str]:
+    """특정 날짜의 진행 중(scheduled) 예약 주소를 {시간대: 주소}로 반환합니다. (date, status) 인덱스 조회입니다."""
+    conn = get_connection(property_id)
     cursor = conn.execute(
-        "UPDATE available_slots SET is_available = 0 WHERE date = ? AND time_slot = ? AND is_available = 1",
-        (target_date, time_slot),
+        "SELECT time_slot, address FROM repairs WHERE date = ? AND status = 'scheduled'",
+        (target_date,),
+    )
+    booked = dict(cursor.fetchall())
+    conn.close()
+    return booked
+
+
+def _book_slot(conn, target_date: str, time_slot: str, hold_id: str | None) -> bool:
+    cursor = conn.execute(
+        "UPDATE available_slots AS s SET is_available = 0 "
+        f"WHERE date = ? AND time_slot = ? AND is_available = 1 AND NOT {HELD_BY_OTHERS}",
+        (target_date, time_slot, hold_id),
     )
     success = cursor.rowcount > 0
+    if success and hold_id:
+        conn.execute("DELETE FROM slot_holds WHERE hold_id = ?", (hold_id,))
+    return success
+
+
+def book_slot(
+    target_date: str,
+    time_slot: str,
+    hold_id: str | None = None,
+    property_id: str = DEFAULT_PROPERTY,
+) -> bool:
+    """시간대를 예약합니다. 성공 시 True, 이미 예약됐거나 다른 세션이 가점유 중이면 False.
+
+    hold_id의 가점유는 예약과 같은 트랜잭션에서 소진됩니다.
+    """
+    conn = get_connection(property_id)
+    try:
+        success = _book_slot(conn, target_date, time_slot, hold_id)
+        conn.commit()
+    finally:
+        conn.close()
+    return success
+
+
+def create_slot_hold(
+    target_date: str,
+    time_slot: str,
+    hold_id: str,
+    ttl_seconds: int = HOLD_TTL_SECONDS,
+    property_id: str = DEFAULT_PROPERTY,
+) -> bool:
+    """빈 슬롯을 hold_id로 ttl_seconds 동안 가점유합니다. 성공 시 True.
+
+    같은 hold_id로 다시 호출하면 만료 시각을 연장하고, 다른 슬롯을 잡으면 기존 가점유는 해제됩니다.
+    다른 hold_id의 유효한 가점유가 있거나 빈 슬롯이 아니면 False를 반환하고 기존 가점유를 유지합니다.
+    """
+    conn = get_connection(property_id)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        _sweep_expired_holds(conn)
+        cursor = conn.execute(
+            "INSERT INTO slot_holds (date, time_slot, hold_id, expires_at) "
+            "SELECT date, time_slot, ?, strftime('%Y-%m-%dT%H:%M:%fZ', 'now', ?) "
+            "FROM available_slots WHERE date = ? AND time_slot = ? AND is_available = 1 "
+            "ON CONFLICT (date, time_slot) DO UPDATE SET "
+            "hold_id = excluded.hold_id, expires_at = excluded.expires_at "
+            "WHERE slot_holds.hold_id = excluded.hold_id",
+            (hold_id, f"+{ttl_seconds} seconds", target_date, time_slot),
+        )
+        success = cursor.rowcount > 0
+        if success:
+            conn.execute(
+                "DELETE FROM slot_holds WHERE hold_id = ? AND NOT (date = ? AND time_slot = ?)",
+                (hold_id, target_date, time_slot),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return success
+
+
+def release_slot_hold(hold_id: str, property_id: str = DEFAULT_PROPERTY):
+    """hold_id의 가점유를 해제합니다."""
+    conn = get_connection(property_id)
+    conn.execute("DELETE FROM slot_holds WHERE hold_id = ?", (hold_id,))
     conn.commit()
     conn.close()
-    return success
 
 
-def restore_slot(target_date: str, time_slot: str):
-    """취소된 예약의 시간대를 복구합니다."""
-    conn = get_connection()
+def _sweep_expired_holds(conn) -> int:
+    return conn.execute(
+        "DELETE FROM slot_holds WHERE expires_at <= strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+    ).rowcount
+
+
+def sweep_expired_holds(property_id: str = DEFAULT_PROPERTY) -> int:
+    """만료된 가점유를 expires_at 인덱스 범위 삭제로 정리하고 삭제 건수를 반환합니다."""
+    conn = get_connection(property_id)
+    try:
+        with conn:
+            return _sweep_expired_holds(conn)
+    finally:
+        conn.close()
+
+
+def restore_slot(target_date: str, time_slot: str, property_id: str = DEFAULT_PROPERTY):
+    """취소된 예약의 시간대를 복구합니다. 휴무 슬롯은 복구하지 않습니다."""
+    conn = get_connection(property_id)
     conn.execute(
-        "UPDATE available_slots SET is_available = 1 WHERE date = ? AND time_slot = ?",
+        "UPDATE available_slots SET is_available = 1 WHERE date = ? AND time_slot = ? AND is_available = 0",
         (target_date, time_slot),
     )
     conn.commit()
     conn.close()
 
 
-def generate_ticket_id(target_date: str) -> str:
-    """KPM-YYYYMMDD-NNN 형식의 티켓 번호를 생성합니다."""
-    date_part = target_date.replace("-", "")
-    conn = get_connection()
+def _next_ticket_id(conn, target_date: str) -> str:
+    # 재배정된 예약은 원래 날짜의 번호를 유지하므로 날짜별 건수가 아니라 같은 접두어의 최대 번호를 씁니다.
+    # 접두어 범위 조건('-' 다음 문자가 '.')이라 기본키 인덱스 범위 스캔입니다.
+    prefix = f"KPM-{target_date.replace('-', '')}-"
     cursor = conn.execute(
-        "SELECT COUNT(*) FROM repairs WHERE date = ?",
-        (target_date,),
+        "SELECT MAX(CAST(substr(ticket_id, ?) AS INTEGER)) FROM repairs "
+        "WHERE ticket_id >= ? AND ticket_id < ?",
+        (len(prefix) + 1, prefix, prefix[:-1] + "."),
     )
-    count = cursor.fetchone()[0]
-    conn.close()
-    return f"KPM-{date_part}-{count + 1:03d}"
+    last = cursor.fetchone()[0] or 0
+    return f"{prefix}{last + 1:03d}"
 
 
-def create_repair(
+def generate_ticket_id(target_date: str, property_id: str = DEFAULT_PROPERTY) -> str:
+    """KPM-YYYYMMDD-NNN 형식의 티켓 번호를 생성합니다."""
+    conn = get_connection(property_id)
+    try:
+        return _next_ticket_id(conn, target_date)
+    finally:
+        conn.close()
+
+
+def _insert_repair(
+    conn,
     ticket_id: str,
     name: str,
     address: str,
@@ -125,12 +655,10 @@ def create_repair(
     time_slot: str,
     issue_type: str,
     issue_description: str,
-    email: str | None = None,
+    email: str | None,
 ) -> dict:
-    """수리 예약 레코드를 생성합니다."""
-    conn = get_connection()
     conn.execute(
-        "INSERT INTO repairs (ticket_id, name, address, date, time_slot, issue_type, issue_description, email) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        "INSERT INTO repairs (ticket_id, name, address, date, time_slot, issue_type, issue_description, email, address_norm) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
         (
             ticket_id,
             name,
@@ -139,12 +667,11 @@ def create_repair(
             time_slot,
             issue_type,
             issue_description,
-            email,
+            normalize_email(email),
+            normalize_address(address),
         ),
     )
-    conn.commit()
-    conn.close()
-    return {
+    repair = {
         "ticket_id": ticket_id,
         "name": name,
         "address": address,
@@ -152,44 +679,248 @@ def create_repair(
         "time_slot": time_slot,
         "issue_type": issue_type,
         "issue_description": issue_description,
-        "email": email,
+        "email": normalize_email(email),
         "status": "scheduled",
     }
+    record_event(conn, "created", repair)
+    return repair
+
+
+def create_repair(
+    ticket_id: str,
+    name: str,
+    address: str,
+    target_date: str,
+    time_slot: str,
+    issue_type: str,
+    issue_description: str,
+    email: str | None = None,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict:
+    """수리 예약 레코드를 생성합니다."""
+    conn = get_connection(property_id)
+    try:
+        repair = _insert_repair(
+            conn, ticket_id, name, address, target_date, time_slot, issue_type, issue_description, email
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return repair
+
+
+def book_repair(
+    name: str,
+    address: str,
+    target_date: str,
+    time_slot: str,
+    issue_type: str,
+    issue_description: str,
+    email: str | None = None,
+    hold_id: str | None = None,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict | None:
+    """슬롯 예약, 티켓 번호 발급, 예약 레코드 생성을 한 트랜잭션으로 처리합니다.
+
+    슬롯이 이미 예약됐거나 다른 세션이 가점유 중이면 None을 반환합니다. 도중에 실패하면 슬롯 예약도
+    롤백되어 슬롯이 소진된 채로 남지 않습니다.
+    """
+    conn = get_connection(property_id)
+    try:
+        # 같은 날짜 번호를 동시에 발급하지 않도록 쓰기 락을 먼저 잡습니다.
+        conn.execute("BEGIN IMMEDIATE")
+        if not _book_slot(conn, target_date, time_slot, hold_id):
+            conn.rollback()
+            return None
+        repair = _insert_repair(
+            conn,
+            _next_ticket_id(conn, target_date),
+            name,
+            address,
+            target_date,
+            time_slot,
+            issue_type,
+            issue_description,
+            email,
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return repair
+
+
+def record_event(conn, event_type: str, repair: dict):
+    """repair_events에 변경 이벤트를 추가합니다. 호출자의 트랜잭션 안에서 커밋됩니다."""
+    import json
+
+    conn.execute(
+        "INSERT INTO repair_events (ticket_id, event_type, payload) VALUES (?, ?, ?)",
+        (repair["ticket_id"], event_type, json.dumps(repair, ensure_ascii=False)),
+    )
+
+
+def queue_notification(conn, email: str, notification_type: str, payload: dict):
+    """notification_outbox에 알림을 추가합니다. 호출자의 트랜잭션 안에서 커밋됩니다."""
+    import json
+
+    conn.execute(
+        "INSERT INTO notification_outbox (email, notification_type, payload) VALUES (?, ?, ?)",
+        (email, notification_type, json.dumps(payload, ensure_ascii=False)),
+    )
+
+
+def changes_since(
+    cursor: int = 0, limit: int = 100, property_id: str = DEFAULT_PROPERTY
+) -> dict:
+    """cursor(seq) 이후의 변경 이벤트를 seq 순으로 최대 limit개 반환합니다.
+
+    next_cursor를 다음 호출의 cursor로 넘기면 이어서 읽습니다. 기본키 범위 스캔입니다.
+    """
+    import json
+
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        "SELECT seq, ticket_id, event_type, payload, created_at FROM repair_events "
+        "WHERE seq > ? ORDER BY seq LIMIT ?",
+        (cursor, limit),
+    ).fetchall()
+    conn.close()
+    events = [{**dict(row), "payload": json.loads(row["payload"])} for row in rows]
+    return {
+        "events": events,
+        "next_cursor": events[-1]["seq"] if events else cursor,
+        "has_more": len(events) == limit,
+    }
 
 
-def get_repair(ticket_id: str) -> dict | None:
+def get_repair(ticket_id: str, property_id: str = DEFAULT_PROPERTY) -> dict | None:
     """티켓 번호로 예약 정보를 조회합니다."""
-    conn = get_connection()
+    conn = get_connection(property_id)
     conn.row_factory = sqlite3.Row
     cursor = conn.execute("SELECT * FROM repairs WHERE ticket_id = ?", (ticket_id,))
     row = cursor.fetchone()
     conn.close()
+    if row:
+        return dict(row)
+    return get_archived_repair(ticket_id, property_id)
+
+
+def get_archived_repair(ticket_id: str, property_id: str = DEFAULT_PROPERTY) -> dict | None:
+    """아카이브 DB에서 예약 정보를 조회합니다. 아카이브된 예약에는 archived_at이 포함됩니다."""
+    path = archive_path(property_id)
+    if not path.exists():
+        return None
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(
+            "SELECT * FROM repairs WHERE ticket_id = ?", (ticket_id,)
+        )
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if row:
+        return dict(row)
+    return None
+
+
+def find_active_repairs(
+    email: str,
+    address: str,
+    limit: int = 5,
+    property_id: str = DEFAULT_PROPERTY,
+) -> list[dict]:
+    """이메일과 주소가 모두 일치하는 진행 중(scheduled) 예약을 일정 순으로 조회합니다.
+
+    티켓 번호 없이 다른 임차인의 예약을 볼 수 없도록 둘 다 요구하고, 예약 확인·변경·취소에 필요한
+    항목만 반환합니다. 주소와 이메일은 정규화해 비교하며(시·도 표기, 공백, 대소문자 차이 무시)
+    idx_repairs_tenant를 탑니다.
+    """
+    email = normalize_email(email)
+    if not email or not address:
+        return []
+
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.execute(
+        "SELECT ticket_id, date, time_slot, issue_type, status FROM repairs "
+        "WHERE address_norm = ? AND email = ? AND status = 'scheduled' "
+        "ORDER BY date, time_slot LIMIT ?",
+        (normalize_address(address), email, limit),
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
+
+
+def find_duplicate_repair(
+    address: str,
+    issue_type: str,
+    target_date: str,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict | None:
+    """같은 주소·문제 유형으로 희망 날짜 전후 DUPLICATE_WINDOW_DAYS 이내에 잡힌 진행 중 예약을 찾습니다."""
+    center = date.fromisoformat(target_date)
+    window = timedelta(days=DUPLICATE_WINDOW_DAYS)
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.execute(
+        "SELECT * FROM repairs WHERE address_norm = ? AND issue_type = ? "
+        "AND status = 'scheduled' AND date BETWEEN ? AND ? ORDER BY date LIMIT 1",
+        (
+            normalize_address(address),
+            issue_type,
+            (center - window).isoformat(),
+            (center + window).isoformat(),
+        ),
+    )
+    row = cursor.fetchone()
+    conn.close()
     if row:
         return dict(row)
     return None
 
 
-def cancel_repair_record(ticket_id: str) -> dict:
-    """예약을 취소하고 슬롯을 복구합니다."""
-    repair = get_repair(ticket_id)
-    if not repair:
-        return {"error": "해당 티켓을 찾을 수 없습니다"}
-    if repair["status"] == "cancelled":
-        return {"error": "이미 취소된 예약입니다"}
+def cancel_repair_record(ticket_id: str, property_id: str = DEFAULT_PROPERTY) -> dict:
+    """예약을 취소하고 슬롯을 복구합니다.
 
-    conn = get_connection()
+    상태 확인과 변경을 한 쓰기 트랜잭션에서 처리해, 동시에 들어온 취소 중 하나만 이벤트와
+    취소 메일을 남깁니다.
+    """
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
     try:
-        conn.execute(
-            "UPDATE repairs SET status = 'cancelled' WHERE ticket_id = ?",
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM repairs WHERE ticket_id = ?", (ticket_id,)).fetchone()
+        cursor = conn.execute(
+            "UPDATE repairs SET status = 'cancelled' WHERE ticket_id = ? AND status = 'scheduled'",
             (ticket_id,),
         )
+        if cursor.rowcount != 1:
+            conn.rollback()
+            if row and row["status"] == "cancelled":
+                return {"error": "이미 취소된 예약입니다"}
+            if row is None and get_archived_repair(ticket_id, property_id):
+                return {"error": "방문 일정이 지난 예약입니다"}
+            return {"error": "해당 티켓을 찾을 수 없습니다"}
         conn.execute(
-            "UPDATE available_slots SET is_available = 1 WHERE date = ? AND time_slot = ?",
-            (repair["date"], repair["time_slot"]),
+            "UPDATE available_slots SET is_available = 1 WHERE date = ? AND time_slot = ? AND is_available = 0",
+            (row["date"], row["time_slot"]),
         )
+        repair = dict(row)
+        repair["status"] = "cancelled"
+        record_event(conn, "cancelled", repair)
         conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
     finally:
         conn.close()
 
-    repair["status"] = "cancelled"
     return repair
@@ -0,0 +1,139 @@
+"""notification_outbox 발송.
+
+일괄 작업은 DB 변경과 같은 트랜잭션에서 알림을 대기열에 쌓고, 커밋 후 deliver_outbox가
+SMTP 세션 하나로 대기 중인 알림을 순서대로 발송합니다. SMTP 미설정 시 시뮬레이션으로 처리합니다.
+발송에 실패했거나 SMTP 서버에 접속하지 못한 알림은 다음 실행에서 다시 보냅니다.
+
+재배정 직후 발송하지 못한 알림은 cron 등으로 다시 발송합니다. --property를 생략하면 전체 건물을 차례로 처리합니다:
+    python -m maintenance_agent.notifications
+    python -m maintenance_agent.notifications --property mapo-a
+
+KPM_SMTP_HOST/KPM_SMTP_PORT를 지정하면 Gmail 대신 해당 서버에 평문 SMTP로 접속합니다. 로컬 테스트
+서버(`python -m aiosmtpd -n -l localhost:1025` 등)로 실제 발송 경로를 확인할 때 씁니다.
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import sqlite3
+from email.mime.text import MIMEText
+
+from .db import DEFAULT_PROPERTY, db_path, get_connection, list_properties
+from .tools import _build_email_body
+
+
+def smtp_configured() -> bool:
+    """실제 발송이 가능하도록 SMTP가 설정되어 있는지 확인합니다."""
+    return bool(
+        os.environ.get("KPM_SMTP_HOST")
+        or (os.environ.get("GMAIL_USER") and os.environ.get("GMAIL_APP_PASSWORD"))
+    )
+
+
+def open_smtp() -> tuple[smtplib.SMTP, str]:
+    """로그인까지 마친 SMTP 세션과 발신 주소를 반환합니다. 접속·로그인 실패 시 예외가 그대로 전파됩니다.
+
+    KPM_SMTP_HOST가 있으면 해당 서버에 평문으로 접속하고 계정이 설정된 경우에만 로그인합니다.
+    """
+    smtp_user = os.environ.get("GMAIL_USER", "")
+    smtp_pass = os.environ.get("GMAIL_APP_PASSWORD", "")
+    host = os.environ.get("KPM_SMTP_HOST")
+    if host:
+        server = smtplib.SMTP(host, int(os.environ.get("KPM_SMTP_PORT", "25")))
+    else:
+        server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
+    try:
+        if smtp_user and smtp_pass:
+            server.login(smtp_user, smtp_pass)
+    except BaseException:
+        server.close()
+        raise
+    return server, smtp_user or "noreply@kindredpm.local"
+
+
+def compose(sender: str, to: str, subject: str, body: str) -> str:
+    msg = MIMEText(body, "plain", "utf-8")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to
+    return msg.as_string()
+
+
+def deliver_outbox(limit: int = 500, property_id: str = DEFAULT_PROPERTY) -> dict:
+    """건물의 대기 중(pending)·실패(failed) 알림을 최대 limit건 발송하고 상태별 건수를 반환합니다.
+
+    발송 직후 건별로 상태를 커밋하므로 재실행 시 이미 처리된 알림은 다시 보내지 않습니다.
+    simulated는 SMTP가 설정되지 않은 경우에만 기록합니다. SMTP 접속·로그인에 실패하면 남은 알림을
+    대기 상태로 둔 채(deferred) 중단하고, 발송에 실패한 알림은 failed로 남겨 다음 실행에서 다시 보냅니다.
+    """
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    pending = conn.execute(
+        "SELECT id, email, notification_type, payload FROM notification_outbox "
+        "WHERE status IN ('pending', 'failed') ORDER BY id LIMIT ?",
+        (limit,),
+    ).fetchall()
+
+    simulate = not smtp_configured()
+    server = None
+    sender = ""
+    counts = {"sent": 0, "simulated": 0, "failed": 0, "deferred": 0}
+    try:
+        for index, row in enumerate(pending):
+            subject, body = _build_email_body(
+                row["notification_type"], json.loads(row["payload"])
+            )
+            status = "simulated" if simulate else "failed"
+            if not simulate:
+                if server is None:
+                    try:
+                        server, sender = open_smtp()
+                    except (smtplib.SMTPException, OSError):
+                        counts["deferred"] = len(pending) - index
+                        break
+                try:
+                    server.sendmail(sender, row["email"], compose(sender, row["email"], subject, body))
+                    status = "sent"
+                except smtplib.SMTPServerDisconnected:
+                    server = None
+                except smtplib.SMTPException:
+                    pass
+            conn.execute(
+                "UPDATE notification_outbox SET status = ?, "
+                "sent_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') WHERE id = ?",
+                (status, row["id"]),
+            )
+            conn.commit()
+            counts[status] += 1
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                server.close()
+        conn.close()
+    return counts
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="알림 대기열(outbox) 발송")
+    parser.add_argument("--property", help="건물 ID (기본: 전체 건물)")
+    parser.add_argument("--limit", type=int, default=500, help="건물당 최대 발송 건수")
+    args = parser.parse_args(argv)
+
+    properties = (
+        [args.property]
+        if args.property
+        else [p for p in list_properties() if db_path(p).exists()]
+    )
+    for property_id in properties:
+        counts = deliver_outbox(args.limit, property_id)
+        print(
+            f"[{property_id}] 발송 {counts['sent']}건, 시뮬레이션 {counts['simulated']}건, "
+            f"실패 {counts['failed']}건, 접속 실패로 보류 {counts['deferred']}건"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""방문 전날 리마인더 이메일 일괄 발송.
+
+repairs(date, status) 인덱스로 대상 날짜의 scheduled 예약만 범위 스캔하고, 워커 수만큼 SMTP
+세션을 열어 세션마다 여러 통을 보냅니다(건마다 접속·로그인하지 않음). 발송 전에 reminder_log에
+방문 일시별로 선점(claim)하므로 재실행하거나 겹쳐 실행해도 같은 방문 일시로 두 번 보내지
+않습니다. 실패한 건과, 실행이 중단되어 SENDING_TIMEOUT_S가 지나도록 발송 중(sending)으로 남은 건은
+다음 실행에서 다시 보냅니다.
+
+매일 저녁 cron 등으로 실행하는 것을 전제로 합니다. --property를 생략하면 전체 건물을 차례로 처리합니다:
+    python -m maintenance_agent.reminders
+    python -m maintenance_agent.reminders --date 2026-10-21 --property mapo-a --dry-run
+
+로컬 SMTP 테스트 서버로 확인하려면 KPM_SMTP_HOST/KPM_SMTP_PORT를 지정합니다:
+    python -m aiosmtpd -n -l localhost:1025 &
+    KPM_SMTP_HOST=localhost KPM_SMTP_PORT=1025 python -m maintenance_agent.reminders
+"""
+
+import argparse
+import queue
+import smtplib
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from .db import DEFAULT_PROPERTY, db_path, ensure_db, get_connection, list_properties
+from .notifications import compose, open_smtp, smtp_configured
+from .tools import _build_email_body
+
+# 동시에 여는 SMTP 세션 수. Gmail은 계정당 동시 접속 수를 제한하므로 작게 둡니다.
+REMINDER_WORKERS = 2
+
+# 발송 중(sending) 선점이 이 시간(초)보다 오래되면 중단된 실행으로 보고 다시 선점합니다.
+# 한 실행의 발송 시간보다 충분히 길게 둡니다.
+SENDING_TIMEOUT_S = 30 * 60
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+_STALE = f"strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-{SENDING_TIMEOUT_S} seconds')"
+
+
+def find_due_reminders(target_date: str, property_id: str = DEFAULT_PROPERTY) -> list[dict]:
+    """target_date에 방문 예정인 scheduled 예약 중 리마인더를 아직 보내지 않은 예약을 반환합니다.
+
+    실패(failed)로 기록된 건과 SENDING_TIMEOUT_S가 지난 발송 중(sending) 건은 다시 대상에 포함합니다.
+    """
+    ensure_db(property_id)  # reminder_log가 없는 기존 DB
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(
+        f"""
+        SELECT r.* FROM repairs AS r
+        WHERE r.date = ? AND r.status = 'scheduled' AND r.email IS NOT NULL AND r.email != ''
+          AND NOT EXISTS (
+              SELECT 1 FROM reminder_log AS l
+              WHERE l.ticket_id = r.ticket_id AND l.date = r.date
+                AND l.time_slot = r.time_slot AND l.status != 'failed'
+                AND NOT (l.status = 'sending' AND l.updated_at < {_STALE})
+          )
+        ORDER BY r.time_slot, r.ticket_id
+        """,
+        (target_date,),
+    ).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+
+def _claim(conn, repair: dict) -> bool:
+    """reminder_log에 발송 중(sending)으로 선점합니다. 다른 실행이 이미 선점·발송했으면 False.
+
+    실패한 건과 선점 후 SENDING_TIMEOUT_S가 지난 발송 중 건(중단된 실행)은 다시 선점합니다.
+    """
+    cursor = conn.execute(
+        f"""
+        INSERT INTO reminder_log (ticket_id, date, time_slot, status)
+        VALUES (?, ?, ?, 'sending')
+        ON CONFLICT (ticket_id, date, time_slot) DO UPDATE
+            SET status = 'sending', updated_at = {_NOW}
+            WHERE status = 'failed' OR (status = 'sending' AND updated_at < {_STALE})
+        """,
+        (repair["ticket_id"], repair["date"], repair["time_slot"]),
+    )
+    return cursor.rowcount == 1
+
+
+def _send_worker(jobs: queue.Queue, results: queue.Queue, simulate: bool):
+    """jobs의 예약을 SMTP 세션 하나로 차례로 발송하고 (예약, 상태)를 results에 넣습니다."""
+    server = None
+    sender = ""
+    try:
+        while (repair := jobs.get()) is not None:
+            status = "simulated" if simulate else "failed"
+            try:
+                subject, body = _build_email_body("reminder", repair)
+                # 세션이 끊겼으면(서버 측 유휴 종료 등) 한 번만 다시 접속합니다.
+                for _ in range(0 if simulate else 2):
+                    if server is None:
+                        server, sender = open_smtp()
+                    try:
+                        server.sendmail(
+                            sender, repair["email"], compose(sender, repair["email"], subject, body)
+                        )
+                        status = "sent"
+                        break
+                    except smtplib.SMTPServerDisconnected:
+                        server = None
+            except Exception:
+                pass
+            results.put((repair, status))
+    finally:
+        if server is not None:
+            try:
+                server.quit()
+            except smtplib.SMTPException:
+                server.close()
+
+
+def send_reminders(
+    target_date: str,
+    workers: int = REMINDER_WORKERS,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict:
+    """target_date 방문 예정 예약에 리마인더를 발송하고 상태별 건수를 반환합니다.
+
+    SMTP 미설정 시 시뮬레이션으로 처리하고 simulated로 기록합니다. 결과는 건별로 커밋합니다.
+    """
+    due = find_due_reminders(target_date, property_id)
+    conn = get_connection(property_id)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        claimed = [repair for repair in due if _claim(conn, repair)]
+        conn.commit()
+
+        counts = {
+            "sent": 0,
+            "simulated": 0,
+            "failed": 0,
+            "skipped": len(due) - len(claimed),
+        }
+        if not claimed:
+            return counts
+
+        jobs: queue.Queue = queue.Queue()
+        results: queue.Queue = queue.Queue()
+        for repair in claimed:
+            jobs.put(repair)
+        simulate = not smtp_configured()
+        threads = [
+            threading.Thread(target=_send_worker, args=(jobs, results, simulate), daemon=True)
+            for _ in range(max(1, min(workers, len(claimed))))
+        ]
+        for thread in threads:
+            jobs.put(None)
+            thread.start()
+
+        for _ in claimed:
+            repair, status = results.get()
+            conn.execute(
+                f"UPDATE reminder_log SET status = ?, updated_at = {_NOW} "
+                "WHERE ticket_id = ? AND date = ? AND time_slot = ?",
+                (status, repair["ticket_id"], repair["date"], repair["time_slot"]),
+            )
+            conn.commit()
+            counts[status] += 1
+        for thread in threads:
+            thread.join()
+    finally:
+        conn.close()
+    return counts
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="방문 전날 리마인더 이메일 일괄 발송")
+    parser.add_argument(
+        "--date",
+        default=(date.today() + timedelta(days=1)).isoformat(),
+        help="방문 날짜 (YYYY-MM-DD, 기본: 내일)",
+    )
+    parser.add_argument("--property", help="건물 ID (기본: 전체 건물)")
+    parser.add_argument("--workers", type=int, default=REMINDER_WORKERS, help="동시 SMTP 세션 수")
+    parser.add_argument("--dry-run", action="store_true", help="발송 대상만 출력")
+    args = parser.parse_args(argv)
+
+    properties = (
+        [args.property]
+        if args.property
+        else [p for p in list_properties() if db_path(p).exists()]
+    )
+    # 건물을 병렬로 처리하면 SMTP 동시 접속이 건물 수만큼 늘어나므로 차례로 처리합니다.
+    for property_id in properties:
+        if args.dry_run:
+            due = find_due_reminders(args.date, property_id)
+            print(f"[{property_id}] {args.date} 발송 대상 {len(due)}건 (dry-run)")
+            for repair in due:
+                print(f"  {repair['ticket_id']}  {repair['time_slot']}  {repair['email']}")
+            continue
+        counts = send_reminders(args.date, args.workers, property_id)
+        print(
+            f"[{property_id}] {args.date} 발송 {counts['sent']}건, "
+            f"시뮬레이션 {counts['simulated']}건, 실패 {counts['failed']}건, "
+            f"이미 처리 {counts['skipped']}건"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""녹화된 세션 재생 하네스.
+
+채팅 앱을 KPM_RECORD_DIR과 함께 실행하면 턴마다 채택된 시도의 이벤트 스트림이 JSONL 픽스처로
+저장됩니다. 각 줄은 다음 중 하나입니다.
+
+- {"type": "header", "prompt": ..., "recorded_at": ...}
+- {"type": "event", "t": 턴 시작 후 경과 초, "event": ADK Event JSON}
+- {"type": "parts", "parts": 녹화 당시 TurnView가 만든 parts}
+
+run은 픽스처를 모델 호출 없이 TurnView로 재생해 이벤트 종류별 처리 시간과 렌더링 호출 수를
+측정하고, 툴 호출·응답 짝짓기와 parts가 녹화 당시와 같은지 검사합니다. 하나라도 다르면 종료
+코드 1을 반환합니다. 채팅 앱도 KPM_REPLAY_PATH를 지정하면 모델 대신 픽스처를 재생합니다.
+
+사용법:
+    KPM_RECORD_DIR=recordings streamlit run app.py
+    python -m maintenance_agent.replay run recordings/*.jsonl
+    python -m maintenance_agent.replay run recordings/20261019-101500-3fa2c1.jsonl --speed 1
+"""
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from .turn_view import TurnView
+
+
+class SessionRecorder:
+    """한 턴의 이벤트를 도착 시각과 함께 모았다가 픽스처 파일로 저장합니다."""
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self._started = time.monotonic()
+        self._events: list[tuple[float, dict]] = []
+
+    def add(self, event):
+        self._events.append(
+            (time.monotonic() - self._started, event.model_dump(mode="json", exclude_none=True))
+        )
+
+    def save(self, directory: str | Path, parts: list[dict]) -> Path:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        recorded_at = datetime.now()
+        path = directory / f"{recorded_at:%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            lines = [{"type": "header", "prompt": self.prompt, "recorded_at": recorded_at.isoformat()}]
+            lines += [{"type": "event", "t": round(t, 4), "event": e} for t, e in self._events]
+            lines.append({"type": "parts", "parts": parts})
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return path
+
+
+def load_fixture(path: str | Path) -> dict:
+    """픽스처를 읽어 {"prompt", "events": [(t, Event)], "parts"}를 반환합니다."""
+    from google.adk.events import Event
+
+    fixture = {"prompt": "", "events": [], "parts": None}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "header":
+                fixture["prompt"] = record["prompt"]
+            elif record["type"] == "event":
+                fixture["events"].append((record["t"], Event.model_validate(record["event"])))
+            elif record["type"] == "parts":
+                fixture["parts"] = record["parts"]
+    return fixture
+
+
+def replay_events(fixture: dict, speed: float = 0):
+    """픽스처의 이벤트를 yield합니다. speed가 0이면 대기 없이, 아니면 녹화 간격의 1/speed로 재생합니다."""
+    started = time.monotonic()
+    for t, event in fixture["events"]:
+        if speed > 0:
+            delay = started + t / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        yield event
+
+
+class HeadlessUI:
+    """TurnView가 쓰는 streamlit API의 대역. 렌더링 호출 수와 그린 문자 수만 셉니다.
+
+    status()·empty()가 돌려주는 컨테이너도 자기 자신입니다.
+    """
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+        self.chars = 0
+
+    def _render(self, kind: str, text: str = ""):
+        self.calls[kind] += 1
+        self.chars += len(text)
+
+    def status(self, label: str, expanded: bool = False, state: str = "running"):
+        self._render("status", label)
+        return self
+
+    def update(self, label: str = "", state: str = "", expanded: bool = False):
+        self._render("update", label)
+
+    def empty(self):
+        self._render("empty")
+        return self
+
+    def markdown(self, text: str):
+        self._render("markdown", text)
+
+    def code(self, text: str, language: str | None = None):
+        self._render("code", text)
+
+    def caption(self, text: str):
+        self._render("caption", text)
+
+    def divider(self):
+        self._render("divider")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _event_kind(event) -> str:
+    if not event.content or not event.content.parts:
+        return "other"
+    part = event.content.parts[0]
+    if part.function_call:
+        return "tool_call"
+    if part.function_response:
+        return "tool_response"
+    if getattr(part, "thought", False) and part.text:
+        return "thinking"
+    if part.text:
+        return "text"
+    return "other"
+
+
+def expected_tool_pairs(events) -> list[tuple[str, dict]]:
+    """function_response마다 같은 id의 function_call을 찾아 (이름, 인자) 목록을 반환합니다.
+
+    TurnView의 도착 순서 짝짓기와 독립적으로 계산하는 기준값입니다. id가 없으면 응답 이름만 씁니다.
+    """
+    calls = {}
+    pairs = []
+    for event in events:
+        if getattr(event, "partial", False) or not event.content or not event.content.parts:
+            continue
+        for part in event.content.parts:
+            if part.function_call:
+                calls[part.function_call.id] = part.function_call
+            elif part.function_response:
+                fr = part.function_response
+                call = calls.get(fr.id) if fr.id else None
+                pairs.append((fr.name, dict(call.args) if call and call.args else None))
+    return pairs
+
+
+def replay_fixture(path: str | Path, speed: float = 0) -> dict:
+    """픽스처 하나를 HeadlessUI로 재생하고 측정값과 검사 결과를 반환합니다."""
+    fixture = load_fixture(path)
+    ui = HeadlessUI()
+    view = TurnView(ui)
+    per_kind: dict[str, list[float]] = {}
+    for event in replay_events(fixture, speed):
+        started = time.perf_counter()
+        view.handle(event)
+        per_kind.setdefault(_event_kind(event), []).append(time.perf_counter() - started)
+    parts = view.finish()
+
+    problems = []
+    tools = [(part["name"], part["args"]) for part in parts if part["type"] == "tool"]
+    expected = expected_tool_pairs(event for _, event in fixture["events"])
+    if len(tools) != len(expected):
+        problems.append(f"툴 결과 수 {len(tools)} != 응답 수 {len(expected)}")
+    for index, ((name, args), (expected_name, expected_args)) in enumerate(zip(tools, expected)):
+        if name != expected_name or (expected_args is not None and args != expected_args):
+            problems.append(f"툴 #{index}: {name}{args} != {expected_name}{expected_args}")
+    if fixture["parts"] is not None and parts != fixture["parts"]:
+        problems.append("parts가 녹화 당시와 다릅니다")
+
+    all_times = [t for times in per_kind.values() for t in times]
+    return {
+        "prompt": fixture["prompt"],
+        "events": len(all_times),
+        "total_ms": sum(all_times) * 1000,
+        "by_kind": {
+            kind: {
+                "count": len(times),
+                "median_us": statistics.median(times) * 1e6,
+                "max_us": max(times) * 1e6,
+            }
+            for kind, times in sorted(per_kind.items())
+        },
+        "render_calls": dict(ui.calls),
+        "rendered_chars": ui.chars,
+        "problems": problems,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="녹화된 세션 재생")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="픽스처 재생, 이벤트 처리 비용 측정, 짝짓기 검사")
+    run_parser.add_argument("paths", nargs="+", type=Path)
+    run_parser.add_argument(
+        "--speed", type=float, default=0, help="재생 배속 (0: 대기 없이, 1: 녹화 속도)"
+    )
+
+    args = parser.parse_args(argv)
+    failed = 0
+    for path in args.paths:
+        result = replay_fixture(path, args.speed)
+        print(
+            f"{path.name}: \"{result['prompt'][:30]}\" 이벤트 {result['events']}개, "
+            f"처리 {result['total_ms']:.2f}ms, 렌더링 {sum(result['render_calls'].values())}회 "
+            f"/ {result['rendered_chars']:,}자"
+        )
+        for kind, stats in result["by_kind"].items():
+            print(
+                f"  {kind:<14}{stats['count']:>6}개  중앙값 {stats['median_us']:>8.1f}µs  "
+                f"최대 {stats['max_us']:>8.1f}µs"
+            )
+        for problem in result["problems"]:
+            print(f"  ✗ {problem}")
+        failed += bool(result["problems"])
+    if failed:
+        print(f"검사 실패: {failed}/{len(args.paths)}개 픽스처")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""날짜(또는 일부 시간대) 휴무 처리와 영향받는 예약의 일괄 재배정.
+
+기사 결근 등으로 특정 날짜를 닫으면, 해당 슬롯의 진행 중 예약을 가장 가까운 빈 슬롯으로
+한 트랜잭션 안에서 옮깁니다. 티켓 번호는 유지되며, 임차인별 알림 1건이 notification_outbox에
+쌓인 뒤 커밋 후 SMTP 세션 하나로 발송됩니다.
+
+사용법:
+    python -m maintenance_agent.reschedule 2026-10-21
+    python -m maintenance_agent.reschedule 2026-10-21 --slots "오후 1시" "오후 2시" --dry-run
+    python -m maintenance_agent.reschedule 2026-10-21 --property mapo-a
+"""
+
+import argparse
+import sqlite3
+from datetime import date, timedelta
+
+from .db import (
+    DEFAULT_PROPERTY,
+    HELD_BY_OTHERS,
+    TIME_SLOTS,
+    get_connection,
+    init_db,
+    queue_notification,
+    record_event,
+)
+
+# 재배정 후보로 볼 원래 날짜 전후 일수
+SEARCH_DAYS = 7
+
+
+def _distance(origin: tuple[date, int], candidate: tuple[date, int]) -> tuple:
+    """(날짜 차, 시간대 차, 원래 날짜보다 이른지) 순으로 비교하는 거리. 같은 거리면 뒤 날짜 우선."""
+    days = (candidate[0] - origin[0]).days
+    return (abs(days), abs(candidate[1] - origin[1]), days < 0)
+
+
+def _greedy_match(affected: list[dict], free_slots: list[tuple[str, str]]) -> dict:
+    """전체 (예약, 빈 슬롯) 쌍을 거리순으로 훑으며 양쪽이 모두 비어 있으면 배정합니다."""
+    origins = [
+        (date.fromisoformat(r["date"]), TIME_SLOTS.index(r["time_slot"])) for r in affected
+    ]
+    candidates = [(date.fromisoformat(d), TIME_SLOTS.index(t)) for d, t in free_slots]
+    pairs = sorted(
+        (_distance(origin, candidate), i, j)
+        for i, origin in enumerate(origins)
+        for j, candidate in enumerate(candidates)
+    )
+    assignment = {}
+    taken = set()
+    for _, i, j in pairs:
+        if i in assignment or j in taken:
+            continue
+        assignment[i] = free_slots[j]
+        taken.add(j)
+        if len(assignment) == len(affected):
+            break
+    return assignment
+
+
+def close_and_reschedule(
+    target_date: str,
+    time_slots: list[str] | None = None,
+    search_days: int = SEARCH_DAYS,
+    dry_run: bool = False,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict:
+    """건물의 target_date time_slots(기본: 전체)를 휴무 처리하고 영향받는 예약을 재배정합니다.
+
+    재배정 후보는 내일 이후, target_date ± search_days 범위의 빈 슬롯입니다.
+    dry_run이면 배정 결과만 계산하고 롤백합니다.
+    """
+    closed = list(time_slots or TIME_SLOTS)
+    unknown = [slot for slot in closed if slot not in TIME_SLOTS]
+    if unknown:
+        return {"error": f"알 수 없는 시간대: {', '.join(unknown)}"}
+
+    center = date.fromisoformat(target_date)
+    earliest = max(center - timedelta(days=search_days), date.today() + timedelta(days=1))
+    latest = center + timedelta(days=search_days)
+
+    init_db(property_id)  # 후보 범위의 슬롯이 시딩되어 있도록 보장
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        placeholders = ", ".join("?" for _ in closed)
+        affected = [
+            dict(row)
+            for row in conn.execute(
+                f"SELECT * FROM repairs WHERE date = ? AND time_slot IN ({placeholders}) "
+                "AND status = 'scheduled' ORDER BY time_slot, ticket_id",
+                (target_date, *closed),
+            )
+        ]
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO available_slots (date, time_slot, is_available) VALUES (?, ?, 1)",
+            [(target_date, slot) for slot in closed],
+        )
+        conn.execute(
+            f"UPDATE available_slots SET is_available = -1 "
+            f"WHERE date = ? AND time_slot IN ({placeholders})",
+            (target_date, *closed),
+        )
+
+        # 임차인이 예약 확인 중인(가점유) 슬롯은 후보에서 제외합니다.
+        free_slots = [
+            (row["date"], row["time_slot"])
+            for row in conn.execute(
+                "SELECT date, time_slot FROM available_slots s "
+                f"WHERE date BETWEEN ? AND ? AND is_available = 1 AND NOT {HELD_BY_OTHERS}",
+                (earliest.isoformat(), latest.isoformat(), None),
+            )
+        ]
+        assignment = _greedy_match(affected, free_slots)
+
+        moved = []
+        unplaced = []
+        per_tenant = {}
+        for i, repair in enumerate(affected):
+            if i not in assignment:
+                unplaced.append(repair)
+                continue
+            new_date, new_slot = assignment[i]
+            conn.execute(
+                "UPDATE available_slots SET is_available = 0 "
+                "WHERE date = ? AND time_slot = ? AND is_available = 1",
+                (new_date, new_slot),
+            )
+            conn.execute(
+                "UPDATE repairs SET date = ?, time_slot = ? WHERE ticket_id = ?",
+                (new_date, new_slot, repair["ticket_id"]),
+            )
+            change = {
+                **repair,
+                "previous_date": repair["date"],
+                "previous_time_slot": repair["time_slot"],
+                "date": new_date,
+                "time_slot": new_slot,
+            }
+            record_event(conn, "rescheduled", change)
+            moved.append(change)
+            if repair["email"]:
+                per_tenant.setdefault(repair["email"], []).append(change)
+
+        for email, changes in per_tenant.items():
+            queue_notification(
+                conn,
+                email,
+                "rescheduled",
+                {
+                    "ticket_id": changes[0]["ticket_id"],
+                    "name": changes[0]["name"],
+                    "changes": changes,
+                },
+            )
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "date": target_date,
+        "closed_slots": closed,
+        "moved": moved,
+        "unplaced": unplaced,
+        "notifications_queued": len(per_tenant),
+        "dry_run": dry_run,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="휴무 처리 및 예약 일괄 재배정")
+    parser.add_argument("date", help="휴무 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--property", default=DEFAULT_PROPERTY, help="건물 ID")
+    parser.add_argument("--slots", nargs="+", help="일부 시간대만 닫을 때 지정")
+    parser.add_argument("--search-days", type=int, default=SEARCH_DAYS)
+    parser.add_argument("--dry-run", action="store_true", help="배정 결과만 출력하고 반영하지 않음")
+    parser.add_argument("--no-send", action="store_true", help="알림을 대기열에만 쌓고 발송하지 않음")
+    args = parser.parse_args(argv)
+
+    result = close_and_reschedule(
+        args.date, args.slots, args.search_days, args.dry_run, args.property
+    )
+    if "error" in result:
+        raise SystemExit(result["error"])
+
+    for change in result["moved"]:
+        print(
+            f"{change['ticket_id']}: {change['previous_date']} {change['previous_time_slot']}"
+            f" → {change['date']} {change['time_slot']}"
+        )
+    for repair in result["unplaced"]:
+        print(f"{repair['ticket_id']}: 배정 실패 ({repair['date']} {repair['time_slot']}, {repair['name']})")
+    print(
+        f"재배정 {len(result['moved'])}건, 배정 실패 {len(result['unplaced'])}건, "
+        f"알림 {result['notifications_queued']}건" + (" (dry-run)" if args.dry_run else "")
+    )
+
+    if not args.dry_run and not args.no_send:
+        from .notifications import deliver_outbox
+
+        counts = deliver_outbox(property_id=args.property)
+        print(f"알림 발송: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""지난 슬롯·예약의 아카이브와 DB 공간 정리.
+
+지난 날짜의 available_slots와 방문일이 보존 기간보다 오래된 repairs(완료·취소 포함)를
+건물별 아카이브 DB로 옮깁니다. get_repair는 운영 DB에 없으면 아카이브를 조회합니다.
+
+매일 새벽 cron 등으로 실행하는 것을 전제로 합니다. --property를 생략하면 전체 건물을 병렬 처리합니다:
+    python -m maintenance_agent.retention run --days 90
+    python -m maintenance_agent.retention stats --property mapo-a
+"""
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+from .db import (
+    DEFAULT_PROPERTY,
+    archive_path,
+    db_path,
+    ensure_db,
+    fan_out,
+    get_connection,
+    sweep_expired_holds,
+)
+
+RETENTION_DAYS = 90
+
+# 실행 1회당 incremental_vacuum으로 반환할 최대 페이지 수 (0이면 빈 페이지 전부)
+VACUUM_PAGES_PER_RUN = 2000
+
+_REPAIR_COLUMNS = (
+    "ticket_id, name, address, date, time_slot, issue_type, "
+    "issue_description, email, status, address_norm"
+)
+
+
+def create_archive_schema(conn):
+    """ATTACH된 archive 스키마에 아카이브 테이블을 생성합니다."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive.available_slots (
+            date TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            is_available INTEGER NOT NULL,
+            PRIMARY KEY (date, time_slot)
+        )
+    """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive.repairs (
+            ticket_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            date TEXT NOT NULL,
+            time_slot TEXT NOT NULL,
+            issue_type TEXT NOT NULL,
+            issue_description TEXT NOT NULL,
+            email TEXT,
+            status TEXT NOT NULL,
+            address_norm TEXT,
+            archived_at TEXT NOT NULL
+        )
+    """
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS archive.idx_archive_repairs_date ON repairs (date)"
+    )
+
+
+def archive_old_records(
+    retention_days: int = RETENTION_DAYS,
+    today: date | None = None,
+    property_id: str = DEFAULT_PROPERTY,
+) -> dict:
+    """보존 기간이 지난 레코드를 한 트랜잭션으로 아카이브 DB에 옮기고 이동 건수를 반환합니다."""
+    today = today or date.today()
+    repair_cutoff = (today - timedelta(days=retention_days)).isoformat()
+    slot_cutoff = today.isoformat()
+
+    conn = get_connection(property_id)
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path(property_id)),))
+        create_archive_schema(conn)
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO archive.repairs ({_REPAIR_COLUMNS}, archived_at) "
+                f"SELECT {_REPAIR_COLUMNS}, ? FROM main.repairs WHERE date < ?",
+                (today.isoformat(), repair_cutoff),
+            )
+            repairs = conn.execute(
+                "DELETE FROM main.repairs WHERE date < ?", (repair_cutoff,)
+            ).rowcount
+            conn.execute("DELETE FROM main.reminder_log WHERE date < ?", (repair_cutoff,))
+            conn.execute(
+                "INSERT OR REPLACE INTO archive.available_slots "
+                "SELECT date, time_slot, is_available FROM main.available_slots WHERE date < ?",
+                (slot_cutoff,),
+            )
+            slots = conn.execute(
+                "DELETE FROM main.available_slots WHERE date < ?", (slot_cutoff,)
+            ).rowcount
+        conn.execute("DETACH DATABASE archive")
+    finally:
+        conn.close()
+    return {"repairs": repairs, "slots": slots, "repair_cutoff": repair_cutoff}
+
+
+def compact(
+    vacuum_pages: int = VACUUM_PAGES_PER_RUN, property_id: str = DEFAULT_PROPERTY
+) -> str:
+    """빈 페이지를 반환하고 통계를 갱신합니다.
+
+    auto_vacuum이 INCREMENTAL이 아닌 기존 DB는 최초 1회 전체 VACUUM으로 전환합니다.
+    전체 VACUUM은 rowid를 재배치할 수 있으므로 rowid에 묶인 FTS 인덱스를 재구축합니다.
+    """
+    conn = get_connection(property_id)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            conn.execute("INSERT INTO repairs_fts (repairs_fts) VALUES ('rebuild')")
+            conn.commit()
+            mode = "full"
+        else:
+            mode = "incremental"
+        # execute()는 첫 스텝(1페이지)만 진행하므로 끝까지 실행되는 executescript를 씁니다.
+        conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+        # 통계가 오래된 테이블만 ANALYZE합니다.
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    return mode
+
+
+def _file_size(path) -> int:
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def collect_stats(property_id: str = DEFAULT_PROPERTY) -> dict:
+    """DB 파일 크기, 행 수, 대표 조회 지연(ms)을 수집합니다."""
+    conn = get_connection(property_id)
+    try:
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        sample = conn.execute(
+            "SELECT email, address FROM repairs WHERE date >= ? LIMIT 1", (tomorrow,)
+        ).fetchone() or ("", "")
+        queries = {
+            "slot_lookup": (
+                "SELECT time_slot FROM available_slots WHERE date = ? AND is_available = 1",
+                (tomorrow,),
+            ),
+            "ticket_count": ("SELECT COUNT(*) FROM repairs WHERE date = ?", (tomorrow,)),
+            "find_by_email": (
+                "SELECT * FROM repairs WHERE email = ? AND status = 'scheduled'",
+                (sample[0],),
+            ),
+            "repairs_scan": ("SELECT COUNT(*) FROM repairs WHERE status = 'scheduled'", ()),
+        }
+        latency = {}
+        for name, (sql, args) in queries.items():
+            started = time.perf_counter()
+            for _ in range(20):
+                conn.execute(sql, args).fetchall()
+            latency[name] = (time.perf_counter() - started) * 1000 / 20
+
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            "db_bytes": _file_size(db_path(property_id)),
+            "archive_bytes": _file_size(archive_path(property_id)),
+            "free_bytes": conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size,
+            "repairs": conn.execute("SELECT COUNT(*) FROM repairs").fetchone()[0],
+            "slots": conn.execute("SELECT COUNT(*) FROM available_slots").fetchone()[0],
+            "latency_ms": latency,
+        }
+    finally:
+        conn.close()
+
+
+def _print_report(before: dict, after: dict | None = None):
+    columns = ["before", "after"] if after else ["current"]
+    snapshots = [before, after] if after else [before]
+    print(f"{'항목':<20}" + "".join(f"{c:>14}" for c in columns))
+    for key in ("db_bytes", "archive_bytes", "free_bytes", "repairs", "slots"):
+        print(f"{key:<20}" + "".join(f"{s[key]:>14,}" for s in snapshots))
+    for key in before["latency_ms"]:
+        print(
+            f"{key + ' (ms)':<20}"
+            + "".join(f"{s['latency_ms'][key]:>14.3f}" for s in snapshots)
+        )
+
+
+def run_retention(
+    property_id: str,
+    retention_days: int = RETENTION_DAYS,
+    vacuum_pages: int = VACUUM_PAGES_PER_RUN,
+) -> dict:
+    """건물 하나의 아카이브·가점유 정리·공간 정리를 실행하고 전후 통계를 반환합니다."""
+    ensure_db(property_id)  # reminder_log·slot_holds가 없는 기존 DB
+    before = collect_stats(property_id)
+    moved = archive_old_records(retention_days, property_id=property_id)
+    holds = sweep_expired_holds(property_id)
+    mode = compact(vacuum_pages, property_id)
+    return {
+        "before": before,
+        "after": collect_stats(property_id),
+        "moved": moved,
+        "holds": holds,
+        "mode": mode,
+    }
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="예약 데이터 보존·아카이브 작업")
+    parser.add_argument("--property", help="건물 ID (기본: 전체 건물 병렬 실행)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="아카이브 후 공간 정리, 전후 리포트 출력")
+    run_parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+    run_parser.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGES_PER_RUN)
+    sub.add_parser("stats", help="현재 크기·지연 리포트 출력")
+
+    args = parser.parse_args(argv)
+    properties = [args.property] if args.property else None
+    if args.command == "stats":
+        for property_id, stats in fan_out(collect_stats, properties).items():
+            print(f"[{property_id}]")
+            _print_report(stats)
+        return
+
+    results = fan_out(
+        lambda pid: run_retention(pid, args.days, args.vacuum_pages), properties
+    )
+    for property_id, result in results.items():
+        moved = result["moved"]
+        print(
+            f"[{property_id}] 아카이브: repairs {moved['repairs']:,}건 "
+            f"(방문일 < {moved['repair_cutoff']}), slots {moved['slots']:,}건 / "
+            f"만료 가점유 {result['holds']:,}건 삭제 / VACUUM: {result['mode']}"
+        )
+        _print_report(result["before"], result["after"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""issue_description 전문 검색 (SQLite FTS5, trigram 토크나이저).
+
+사용법:
+    python -m maintenance_agent.search query "배관 누수" --limit 10 [--property mapo-a]
+    python -m maintenance_agent.search bench --rows 1000000
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from .db import DEFAULT_PROPERTY, create_schema, ensure_db, fan_out, get_connection
+
+# trigram 토크나이저는 3글자 미만 검색어를 인덱스로 찾지 못합니다.
+MIN_TRIGRAM_LENGTH = 3
+
+
+def _fts_phrase(term: str) -> str:
+    """검색어를 FTS5 문자열 리터럴로 감쌉니다 (연산자 해석 방지)."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _search(conn, query: str, limit: int) -> list[dict]:
+    terms = query.split()
+    long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_LENGTH]
+    short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_LENGTH]
+    if not terms:
+        return []
+
+    conn.row_factory = sqlite3.Row
+    like_sql = "".join(" AND r.issue_description LIKE ?" for _ in short_terms)
+    like_args = [f"%{t}%" for t in short_terms]
+
+    if long_terms:
+        # 3글자 이상 검색어는 인덱스로 후보를 좁히고 bm25 순위로 정렬합니다.
+        sql = (
+            "SELECT r.*, bm25(repairs_fts) AS score FROM repairs_fts "
+            "JOIN repairs r ON r.rowid = repairs_fts.rowid "
+            f"WHERE repairs_fts MATCH ?{like_sql} ORDER BY score LIMIT ?"
+        )
+        args = [" ".join(_fts_phrase(t) for t in long_terms), *like_args, limit]
+    else:
+        # 2글자 이하 검색어만 있으면 인덱스를 쓸 수 없어 최신순 스캔으로 폴백합니다.
+        sql = (
+            "SELECT r.*, NULL AS score FROM repairs r "
+            f"WHERE 1 = 1{like_sql} ORDER BY r.date DESC LIMIT ?"
+        )
+        args = [*like_args, limit]
+    return [dict(row) for row in conn.execute(sql, args)]
+
+
+def search_repairs(
+    query: str, limit: int = 20, property_id: str = DEFAULT_PROPERTY
+) -> list[dict]:
+    """issue_description에서 검색어(공백 구분, AND)를 포함하는 예약을 관련도 순으로 반환합니다."""
+    ensure_db(property_id)  # FTS 인덱스가 없는 기존 DB
+    conn = get_connection(property_id)
+    try:
+        return _search(conn, query, limit)
+    finally:
+        conn.close()
+
+
+def search_all_properties(
+    query: str, limit: int = 20, properties: list[str] | None = None
+) -> list[dict]:
+    """모든 건물 DB를 병렬 검색해 합친 상위 limit건을 반환합니다. 각 행에 property_id가 붙습니다.
+
+    bm25 점수는 건물별 인덱스 기준이라 근사 비교입니다.
+    """
+    per_property = fan_out(lambda pid: search_repairs(query, limit, pid), properties)
+    merged = [
+        {**repair, "property_id": property_id}
+        for property_id, repairs in per_property.items()
+        for repair in repairs
+    ]
+    if merged and merged[0]["score"] is None:
+        merged.sort(key=lambda r: r["date"], reverse=True)
+    else:
+        merged.sort(key=lambda r: r["score"])
+    return merged[:limit]
+
+
+def _bench(rows: int, queries: list[str], repeat: int):
+    from .synthetic import synthetic_repairs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(Path(tmp) / "bench.db")
+        create_schema(conn)
+        started = time.perf_counter()
+        with conn:
+            conn.executemany(
+                "INSERT INTO repairs (ticket_id, name, address, date, time_slot, issue_type, "
+                "issue_description, email, status, address_norm) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                synthetic_repairs(rows),
+            )
+        print(f"적재: {rows:,}행 {time.perf_counter() - started:.1f}s (FTS 트리거 포함)")
+
+        print(f"{'검색어':<16}{'LIKE 스캔(ms)':>14}{'FTS5(ms)':>12}{'결과':>8}")
+        for query in queries:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(
+                    "SELECT * FROM repairs WHERE "
+                    + " AND ".join("issue_description LIKE ?" for _ in query.split())
+                    + " LIMIT 20",
+                    [f"%{term}%" for term in query.split()],
+                ).fetchall()
+            like_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                results = _search(conn, query, 20)
+            fts_ms = (time.perf_counter() - started) * 1000 / repeat
+            print(f"{query:<16}{like_ms:>14.1f}{fts_ms:>12.1f}{len(results):>8}")
+        conn.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="수리 내역 전문 검색")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = sub.add_parser("query", help="검색어로 예약 조회")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--limit", type=int, default=20)
+    query_parser.add_argument("--property", help="건물 ID (기본: 전체 건물 병렬 검색)")
+
+    bench_parser = sub.add_parser("bench", help="합성 데이터로 LIKE 대비 FTS5 성능 측정")
+    bench_parser.add_argument("--rows", type=int, default=1_000_000)
+    bench_parser.add_argument("--repeat", type=int, default=5)
+    bench_parser.add_argument(
+        "--queries",
+        nargs="+",
+        default=["KDB-4821", "E47", "열교환기 과열 E47", "검은 곰팡이", "배관 연결부"],
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "query":
+        if args.property:
+            results = search_repairs(args.query, args.limit, args.property)
+        else:
+            results = search_all_properties(args.query, args.limit)
+        for repair in results:
+            print(
+                f"{repair.get('property_id', args.property)}  "
+                f"{repair['ticket_id']}  {repair['date']} {repair['time_slot']}  "
+                f"[{repair['status']}] {repair['issue_description']}"
+            )
+    else:
+        _bench(args.rows, args.queries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
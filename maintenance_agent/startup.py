@@ -0,0 +1,358 @@
+"""프로세스 시작 비용 측정과 워밍업.
+
+app.py가 첫 화면을 그리기 전에 import하는 모듈(STARTUP_MODULES)과 첫 프롬프트까지 미루는
+모듈(DEFERRED_MODULES)의 import 시간을 `python -X importtime`으로 측정합니다. 매 실행은 새
+인터프리터에서 하며, 첫 실행은 .pyc 생성이 섞이므로 중앙값을 씁니다.
+
+워밍업(start_warmup)은 백그라운드 스레드에서 Runner와 Gemini 클라이언트를 만들고 모델 API
+연결(TCP·TLS)을 미리 열어, 배포 직후 첫 턴이 이 비용을 치르지 않게 합니다. 이후에는 마지막
+턴부터 KEEPALIVE_IDLE_S 동안 가벼운 요청으로 연결을 유지합니다. 턴별 TTFT는 프로세스의 첫
+턴과 이후(steady) 턴을 나눠 기록합니다.
+
+사용법:
+    python -m maintenance_agent.startup imports --repeat 5
+    python -m maintenance_agent.startup ttft --turns 5 --warmup
+"""
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 첫 화면 렌더링 전에 import되는 모듈과 목표 예산(ms, streamlit 제외)
+STARTUP_MODULES = [
+    "maintenance_agent.db",
+    "maintenance_agent.tools",
+    "maintenance_agent.startup",
+    "maintenance_agent.turn_view",
+]
+STARTUP_BUDGET_MS = 50
+
+# 첫 프롬프트 처리 시점으로 미룬 모듈
+DEFERRED_MODULES = [
+    "google.adk.runners",
+    "google.adk.sessions",
+    "google.adk.agents.run_config",
+    "google.genai.types",
+    "maintenance_agent.agent",
+    "maintenance_agent.turn_budget",
+]
+
+APP_NAME = "maintenance_agent"
+
+# 워밍업 요청 제한 시간(초)과 연결 유지 주기. aiohttp 기본 유휴 연결 만료(15초)보다 짧게 둡니다.
+WARMUP_TIMEOUT_S = 30
+KEEPALIVE_INTERVAL_S = float(os.environ.get("KPM_MODEL_KEEPALIVE_S", "10"))
+KEEPALIVE_IDLE_S = 600
+# 1이면 워밍업 때 1토큰짜리 생성 요청까지 보냅니다(과금됨).
+PRIME_MODEL = os.environ.get("KPM_PRIME_MODEL") == "1"
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_runner = None
+_runner_lock = threading.Lock()
+# get_runner()가 ADK import 동안 _runner_lock을 잡고 있으므로 워밍업 시작은 별도 락으로 보호합니다.
+_warmup_lock = threading.Lock()
+_warmup_thread: threading.Thread | None = None
+_last_turn_at = time.monotonic()
+_ttft_lock = threading.Lock()
+_ttft: dict = {"first": None, "steady": []}
+
+
+def get_runner():
+    """프로세스 공용 Runner를 반환합니다. 처음 호출할 때 ADK와 에이전트를 import해 만듭니다.
+
+    환경 변수를 설정한 뒤에 호출해야 합니다.
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            from google.adk.runners import Runner
+            from google.adk.sessions import InMemorySessionService
+
+            from .agent import root_agent
+
+            _runner = Runner(
+                app_name=APP_NAME,
+                agent=root_agent,
+                session_service=InMemorySessionService(),
+                auto_create_session=True,
+            )
+    return _runner
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def warmup(prime: bool = PRIME_MODEL) -> dict[str, float]:
+    """Runner와 모델 클라이언트를 만들고 모델 API 연결을 엽니다. 단계별 소요 시간(ms)을 반환합니다.
+
+    연결은 모델 메타데이터 조회(models.get)로 엽니다. prime이면 max_output_tokens=1 생성 요청을
+    한 번 더 보내 서버 측 첫 호출 지연까지 미리 치릅니다.
+    """
+    from google.genai import types
+
+    from .turn_budget import run_coroutine
+
+    timings = {}
+    started = time.perf_counter()
+    runner = get_runner()
+    timings["runner_ms"] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    llm = runner.agent.canonical_model
+    client = llm.api_client
+    timings["client_ms"] = _elapsed_ms(started)
+
+    # 연결은 공용 이벤트 루프의 HTTP 세션에 열어야 턴에서 재사용됩니다.
+    started = time.perf_counter()
+    run_coroutine(client.aio.models.get(model=llm.model), WARMUP_TIMEOUT_S)
+    timings["connect_ms"] = _elapsed_ms(started)
+
+    if prime:
+        started = time.perf_counter()
+        run_coroutine(
+            client.aio.models.generate_content(
+                model=llm.model,
+                contents="ping",
+                config=types.GenerateContentConfig(max_output_tokens=1),
+            ),
+            WARMUP_TIMEOUT_S,
+        )
+        timings["prime_ms"] = _elapsed_ms(started)
+    return timings
+
+
+async def _keepalive(client, model: str):
+    import asyncio
+
+    while True:
+        await asyncio.sleep(KEEPALIVE_INTERVAL_S)
+        if time.monotonic() - _last_turn_at > KEEPALIVE_IDLE_S:
+            continue
+        try:
+            await client.aio.models.get(model=model)
+        except Exception:
+            # 연결이 끊겨도 다음 턴이 다시 연결하므로 무시합니다.
+            pass
+
+
+def _warmup_in_background():
+    import asyncio
+
+    from .db import ensure_db
+    from .turn_budget import shared_loop
+
+    ensure_db()
+    warmup()
+    if KEEPALIVE_INTERVAL_S > 0:
+        llm = get_runner().agent.canonical_model
+        asyncio.run_coroutine_threadsafe(_keepalive(llm.api_client, llm.model), shared_loop())
+
+
+def start_warmup() -> threading.Thread:
+    """워밍업을 백그라운드 스레드에서 한 번만 시작합니다. 여러 번 호출해도 같은 스레드를 반환합니다.
+
+    워밍업 중에 첫 턴이 들어오면 get_runner()가 Runner 생성이 끝날 때까지 기다립니다.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(
+                target=_warmup_in_background, name="kpm-warmup", daemon=True
+            )
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def record_ttft(seconds: float) -> str:
+    """턴의 TTFT를 기록·로그하고 구분('first' 또는 'steady')을 반환합니다.
+
+    프로세스에서 처음 기록되는 턴만 first입니다. 연결 유지 기준 시각도 갱신합니다.
+    임차인 화면에는 표시하지 않고 운영 로그(INFO)로만 남깁니다.
+    """
+    import logging
+
+    global _last_turn_at
+    with _ttft_lock:
+        _last_turn_at = time.monotonic()
+        if _ttft["first"] is None:
+            _ttft["first"] = seconds
+            kind = "first"
+        else:
+            _ttft["steady"].append(seconds)
+            kind = "steady"
+    logging.getLogger(__name__).info("TTFT %s %.0fms", kind, seconds * 1000)
+    return kind
+
+
+def ttft_summary() -> dict:
+    """첫 턴 TTFT와 이후 턴 TTFT 중앙값(ms)을 반환합니다. 기록이 없으면 None."""
+    import statistics
+
+    with _ttft_lock:
+        first = _ttft["first"]
+        steady = list(_ttft["steady"])
+    return {
+        "first_ms": first * 1000 if first is not None else None,
+        "steady_median_ms": statistics.median(steady) * 1000 if steady else None,
+        "steady_turns": len(steady),
+    }
+
+
+def measure_ttft(turns: int, prompt: str = "안녕하세요") -> dict:
+    """새 세션에서 prompt로 turns번 턴을 실행해 TTFT를 기록하고 ttft_summary()를 반환합니다.
+
+    첫 턴의 TTFT에는 아직 만들어지지 않은 Runner·클라이언트 생성 시간이 포함됩니다.
+    """
+    from .db import DEFAULT_PROPERTY, ensure_db
+    from .tools import PROPERTY_STATE_KEY
+    from .turn_budget import run_coroutine
+
+    ensure_db()
+
+    async def one_turn(started: float) -> float | None:
+        from google.adk.agents.run_config import RunConfig, StreamingMode
+        from google.genai import types
+
+        runner = get_runner()
+        session = await runner.session_service.create_session(
+            app_name=APP_NAME, user_id="ttft", state={PROPERTY_STATE_KEY: DEFAULT_PROPERTY}
+        )
+        ttft = None
+        async for event in runner.run_async(
+            user_id="ttft",
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text=prompt)]),
+            run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+        ):
+            if ttft is None and event.content and event.content.parts:
+                ttft = time.perf_counter() - started
+        return ttft
+
+    for _ in range(turns):
+        ttft = run_coroutine(one_turn(time.perf_counter()))
+        if ttft is not None:
+            record_ttft(ttft)
+    return ttft_summary()
+
+
+def _importtime(modules: list[str]) -> tuple[float, list[tuple[str, float]]]:
+    """새 인터프리터에서 modules를 import하고 (전체 ms, [(모듈, 누적 ms)])를 반환합니다.
+
+    인터프리터 기동 시 site 등이 import하는 모듈은 제외합니다.
+    """
+    import subprocess
+
+    code = f"import {', '.join(modules)}" if modules else "pass"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=_PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # 들여쓰기가 없는 행이 인터프리터가 직접 import한 최상위 모듈입니다.
+        if not name.startswith("  "):
+            top_level.append((name.strip(), int(cumulative) / 1000))
+    if modules:
+        baseline = {name for name, _ in _importtime([])[1]}
+        top_level = [(name, ms) for name, ms in top_level if name not in baseline]
+    return sum(ms for _, ms in top_level), top_level
+
+
+def measure_imports(modules: list[str], repeat: int = 5) -> dict:
+    """repeat번 측정한 전체 import 시간의 중앙값과 마지막 실행의 상위 모듈을 반환합니다."""
+    import statistics
+
+    totals = []
+    for _ in range(repeat):
+        total, top_level = _importtime(modules)
+        totals.append(total)
+    return {
+        "median_ms": statistics.median(totals),
+        "min_ms": min(totals),
+        "top": sorted(top_level, key=lambda item: item[1], reverse=True)[:10],
+    }
+
+
+def _print_measurement(title: str, measurement: dict):
+    print(
+        f"{title}: 중앙값 {measurement['median_ms']:.1f}ms "
+        f"(최소 {measurement['min_ms']:.1f}ms)"
+    )
+    for name, ms in measurement["top"]:
+        print(f"  {name:<40}{ms:>10.1f}ms")
+
+
+def _run_ttft(args):
+    if "GOOGLE_API_KEY" not in os.environ:
+        from dotenv import load_dotenv
+
+        load_dotenv(Path(__file__).parent / ".env")
+
+    if args.warmup:
+        timings = warmup(prime=args.prime)
+        print("워밍업: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items()))
+    summary = measure_ttft(args.turns, args.prompt)
+    if summary["first_ms"] is None:
+        print("응답 이벤트를 받지 못했습니다.")
+        raise SystemExit(1)
+    print(f"첫 턴 TTFT: {summary['first_ms']:.0f}ms")
+    if summary["steady_median_ms"] is not None:
+        print(
+            f"이후 턴 TTFT 중앙값: {summary['steady_median_ms']:.0f}ms "
+            f"({summary['steady_turns']}턴)"
+        )
+
+
+def main(argv: list[str] | None = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="프로세스 시작 비용 측정")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imports_parser = sub.add_parser("imports", help="-X importtime으로 import 시간 측정")
+    imports_parser.add_argument("--repeat", type=int, default=5)
+    imports_parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+
+    ttft_parser = sub.add_parser("ttft", help="첫 턴과 이후 턴의 TTFT 측정 (모델 API 호출)")
+    ttft_parser.add_argument("--turns", type=int, default=5)
+    ttft_parser.add_argument("--prompt", default="안녕하세요")
+    ttft_parser.add_argument("--warmup", action="store_true", help="첫 턴 전에 warmup() 실행")
+    ttft_parser.add_argument("--prime", action="store_true", help="워밍업 때 1토큰 생성 요청도 전송")
+
+    args = parser.parse_args(argv)
+    if args.command == "ttft":
+        _run_ttft(args)
+        return
+
+    startup = measure_imports(STARTUP_MODULES, args.repeat)
+    _print_measurement("첫 화면 전 import", startup)
+    deferred = []
+    for module in DEFERRED_MODULES:
+        try:
+            _importtime([module])
+            deferred.append(module)
+        except ImportError as exc:
+            print(f"  {module}: 측정 제외 ({exc})")
+    if deferred:
+        _print_measurement("첫 프롬프트로 미룬 import", measure_imports(deferred, args.repeat))
+
+    if startup["median_ms"] > args.budget_ms:
+        print(f"예산 초과: {startup['median_ms']:.1f}ms > {args.budget_ms:.0f}ms")
+        raise SystemExit(1)
+    print(f"예산 이내: {startup['median_ms']:.1f}ms <= {args.budget_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""운영 지표 조회와 집계 일관성 검사.
+
+daily_bookings / daily_slot_usage 집계 테이블은 트리거로 증분 갱신되므로, 조회 비용은
+원본 테이블 크기와 무관하게 O(일수 × 문제 유형 수)입니다. 전체 건물 조회는 건물 DB별로 병렬 조회 후 합산합니다.
+
+사용법:
+    python -m maintenance_agent.stats summary --start 2026-10-01 --end 2026-10-31
+    python -m maintenance_agent.stats summary --property mapo-a
+    python -m maintenance_agent.stats check [--repair]
+"""
+
+import argparse
+import sqlite3
+from datetime import date, timedelta
+
+from .db import (
+    DEFAULT_PROPERTY,
+    SUMMARY_SOURCES,
+    archive_path,
+    ensure_db,
+    fan_out,
+    get_connection,
+    rebuild_summaries,
+)
+
+# 아카이브로 옮겨진 행도 집계 원본에 포함합니다.
+_REPAIRS_WITH_ARCHIVE = (
+    "(SELECT date, issue_type, status FROM main.repairs "
+    "UNION ALL SELECT date, issue_type, status FROM archive.repairs)"
+)
+_SLOTS_WITH_ARCHIVE = (
+    "(SELECT date, is_available FROM main.available_slots "
+    "UNION ALL SELECT date, is_available FROM archive.available_slots)"
+)
+
+
+def _rate(numerator: int, denominator: int) -> float:
+    return round(numerator / denominator, 4) if denominator else 0.0
+
+
+def get_ops_summary(start: str, end: str, property_id: str = DEFAULT_PROPERTY) -> dict:
+    """기간 내 일자·유형별 예약 수, 취소율, 슬롯 가동률을 집계 테이블에서 조회합니다."""
+    ensure_db(property_id)  # 집계 테이블이 없는 기존 DB
+    conn = get_connection(property_id)
+    conn.row_factory = sqlite3.Row
+    bookings = [
+        dict(row)
+        for row in conn.execute(
+            "SELECT date, issue_type, booked, cancelled FROM daily_bookings "
+            "WHERE date BETWEEN ? AND ? ORDER BY date, issue_type",
+            (start, end),
+        )
+    ]
+    slots = [
+        dict(row)
+        for row in conn.execute(
+            "SELECT date, total_slots, booked_slots FROM daily_slot_usage "
+            "WHERE date BETWEEN ? AND ? ORDER BY date",
+            (start, end),
+        )
+    ]
+    conn.close()
+    return _summarize(start, end, bookings, slots)
+
+
+def get_portfolio_summary(start: str, end: str, properties: list[str] | None = None) -> dict:
+    """전체(또는 지정한) 건물의 운영 지표를 병렬 조회해 일자·유형별로 합산합니다.
+
+    반환값은 get_ops_summary와 같은 형식이며 by_property에 건물별 요약이 들어 있습니다.
+    """
+    per_property = fan_out(lambda pid: get_ops_summary(start, end, pid), properties)
+    bookings = {}
+    slots = {}
+    for summary in per_property.values():
+        for row in summary["bookings"]:
+            merged = bookings.setdefault(
+                (row["date"], row["issue_type"]), {**row, "booked": 0, "cancelled": 0}
+            )
+            merged["booked"] += row["booked"]
+            merged["cancelled"] += row["cancelled"]
+        for row in summary["slot_usage"]:
+            merged = slots.setdefault(row["date"], {**row, "total_slots": 0, "booked_slots": 0})
+            merged["total_slots"] += row["total_slots"]
+            merged["booked_slots"] += row["booked_slots"]
+    summary = _summarize(
+        start,
+        end,
+        [bookings[key] for key in sorted(bookings)],
+        [slots[key] for key in sorted(slots)],
+    )
+    summary["by_property"] = per_property
+    return summary
+
+
+def _summarize(start: str, end: str, bookings: list[dict], slots: list[dict]) -> dict:
+    booked = sum(row["booked"] for row in bookings)
+    cancelled = sum(row["cancelled"] for row in bookings)
+    total_slots = sum(row["total_slots"] for row in slots)
+    booked_slots = sum(row["booked_slots"] for row in slots)
+    return {
+        "start": start,
+        "end": end,
+        "bookings": bookings,
+        "slot_usage": slots,
+        "booked": booked,
+        "cancelled": cancelled,
+        "cancellation_rate": _rate(cancelled, booked),
+        "slot_utilization": _rate(booked_slots, total_slots),
+    }
+
+
+def _attach_archive(conn, property_id: str) -> bool:
+    path = archive_path(property_id)
+    if not path.exists():
+        return False
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    tables = {
+        row[0]
+        for row in conn.execute("SELECT name FROM archive.sqlite_master WHERE type = 'table'")
+    }
+    if {"repairs", "available_slots"} <= tables:
+        return True
+    conn.execute("DETACH DATABASE archive")
+    return False
+
+
+def check_consistency(
+    repair: bool = False, property_id: str = DEFAULT_PROPERTY
+) -> list[dict]:
+    """집계 테이블을 원본(운영 DB + 아카이브)에서 다시 계산한 값과 비교해 불일치 목록을 반환합니다.
+
+    repair=True면 불일치가 있을 때 집계 테이블을 재구축합니다.
+    """
+    ensure_db(property_id)
+    conn = get_connection(property_id)
+    try:
+        archived = _attach_archive(conn, property_id)
+        repairs = _REPAIRS_WITH_ARCHIVE if archived else "main.repairs"
+        slots = _SLOTS_WITH_ARCHIVE if archived else "main.available_slots"
+
+        checks = [
+            (
+                "daily_bookings",
+                ("date", "issue_type"),
+                ("booked", "cancelled"),
+                SUMMARY_SOURCES["daily_bookings"].format(repairs=repairs),
+            ),
+            (
+                "daily_slot_usage",
+                ("date",),
+                ("total_slots", "booked_slots"),
+                SUMMARY_SOURCES["daily_slot_usage"].format(slots=slots),
+            ),
+        ]
+        mismatches = []
+        for table, keys, values, source in checks:
+            columns = ", ".join(keys + values)
+            expected = {
+                row[: len(keys)]: row[len(keys) :] for row in conn.execute(source)
+            }
+            actual = {
+                row[: len(keys)]: row[len(keys) :]
+                for row in conn.execute(f"SELECT {columns} FROM main.{table}")
+            }
+            for key in sorted(expected.keys() | actual.keys()):
+                want = expected.get(key, (0,) * len(values))
+                got = actual.get(key, (0,) * len(values))
+                if want != got:
+                    mismatches.append(
+                        {
+                            "table": table,
+                            "key": dict(zip(keys, key)),
+                            "expected": dict(zip(values, want)),
+                            "actual": dict(zip(values, got)),
+                        }
+                    )
+
+        if repair and mismatches:
+            with conn:
+                rebuild_summaries(conn, repairs=repairs, slots=slots)
+        return mismatches
+    finally:
+        conn.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="운영 지표 조회·집계 검사")
+    parser.add_argument("--property", help="건물 ID (기본: 전체 건물)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary_parser = sub.add_parser("summary", help="기간별 운영 지표 출력")
+    summary_parser.add_argument("--start", default=(date.today() - timedelta(days=30)).isoformat())
+    summary_parser.add_argument("--end", default=(date.today() + timedelta(days=7)).isoformat())
+
+    check_parser = sub.add_parser("check", help="집계 테이블을 원본과 비교")
+    check_parser.add_argument("--repair", action="store_true", help="불일치 시 재구축")
+
+    args = parser.parse_args(argv)
+    properties = [args.property] if args.property else None
+    if args.command == "summary":
+        summary = get_portfolio_summary(args.start, args.end, properties)
+        print(
+            f"{summary['start']} ~ {summary['end']}: 예약 {summary['booked']:,}건, "
+            f"취소율 {summary['cancellation_rate']:.1%}, "
+            f"슬롯 가동률 {summary['slot_utilization']:.1%}"
+        )
+        if len(summary["by_property"]) > 1:
+            for property_id, part in summary["by_property"].items():
+                print(
+                    f"  [{property_id}] 예약 {part['booked']:,}건, "
+                    f"취소율 {part['cancellation_rate']:.1%}, "
+                    f"슬롯 가동률 {part['slot_utilization']:.1%}"
+                )
+        for row in summary["bookings"]:
+            print(f"  {row['date']} {row['issue_type']:<16}{row['booked']:>6}{row['cancelled']:>6}")
+        return
+
+    results = fan_out(lambda pid: check_consistency(args.repair, pid), properties)
+    mismatches = [
+        {"property_id": property_id, **mismatch}
+        for property_id, found in results.items()
+        for mismatch in found
+    ]
+    for mismatch in mismatches[:50]:
+        print(mismatch)
+    if not mismatches:
+        print("집계 테이블이 원본과 일치합니다.")
+    elif args.repair:
+        print(f"불일치 {len(mismatches)}건, 집계 테이블을 재구축했습니다.")
+    else:
+        print(f"불일치 {len(mismatches)}건")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,21 @@
+import datetime
 import os
-import smtplib
-from email.mime.text import MIMEText
 from typing import Literal
 
 from .db import (
-    book_slot,
+    DEFAULT_PROPERTY,
+    HOLD_TTL_SECONDS,
+    book_repair,
     cancel_repair_record,
-    create_repair,
-    generate_ticket_id,
+    create_slot_hold,
+    ensure_db,
+    find_active_repairs,
+    find_duplicate_repair,
     get_available_slots,
+    get_booked_addresses,
     get_repair,
-    init_db,
 )
 
-init_db()
-
 IssueType = Literal[
     "sink_leak", "toilet_clog", "boiler_issue", "door_lock_issue", "mold_issue", "other"
 ]
@@ -69,16 +70,69 @@ def provide_quick_fix(issue_type: IssueType) -> dict:
     }
 
 
-def check_available_slots(date: str, issue_type: IssueType) -> dict:
-    """특정 날짜의 예약 가능한 시간대를 조회합니다."""
-    slots = get_available_slots(date)
+# 세션 상태의 건물 키. 앱이 세션 생성 시 넣으며, 없으면 기본 건물 DB를 씁니다.
+PROPERTY_STATE_KEY = "property_id"
+
+# 세션 상태에 저장하는 가점유 키. 재시도·헤징으로 복제된 세션도 상태를 이어받아 같은 가점유를 씁니다.
+HOLD_STATE_KEY = "slot_hold_id"
+
+
+def _property_id(tool_context) -> str:
+    property_id = DEFAULT_PROPERTY
+    if tool_context is not None:
+        property_id = tool_context.state.get(PROPERTY_STATE_KEY) or DEFAULT_PROPERTY
+    ensure_db(property_id)
+    return property_id
+
+
+def _hold_id(tool_context, create: bool = False) -> str | None:
+    import uuid  # 첫 화면 전 import 예산 밖으로 미룹니다.
+
+    if tool_context is None:
+        return uuid.uuid4().hex if create else None
+    hold_id = tool_context.state.get(HOLD_STATE_KEY)
+    if hold_id is None and create:
+        hold_id = uuid.uuid4().hex
+        tool_context.state[HOLD_STATE_KEY] = hold_id
+    return hold_id
+
+
+# tool_context는 ADK가 매개변수 이름으로 주입하며 LLM에 노출되지 않습니다.
+def check_available_slots(
+    date: str, issue_type: IssueType, address: str = "", tool_context=None
+) -> dict:
+    """특정 날짜의 예약 가능한 시간대를 조회합니다.
+
+    address(임차인 주소)를 함께 넘기면 그날 기사 방문 동선에 가까운 순으로 recommended_slots를 반환합니다.
+    """
+    property_id = _property_id(tool_context)
+    slots = get_available_slots(date, _hold_id(tool_context), property_id)
     if not slots:
         return {
             "date": date,
             "available_slots": [],
             "message": f"{date}에는 예약 가능한 시간대가 없습니다.",
         }
-    return {"date": date, "available_slots": slots}
+    result = {"date": date, "available_slots": slots}
+    if address:
+        # routing은 첫 화면 전 import 대상이 아니므로 추천이 필요할 때만 import합니다.
+        from .routing import RECOMMEND_TOP_K, rank_slots
+
+        ranked = rank_slots(slots, get_booked_addresses(date, property_id), address)
+        result["recommended_slots"] = ranked[:RECOMMEND_TOP_K]
+    return result
+
+
+def hold_slot(date: str, time_slot: str, tool_context=None) -> dict:
+    """임차인이 고른 시간대를 예약 확인 동안 잠시 잡아둡니다. 다른 시간대를 잡으면 이전 것은 해제됩니다."""
+    property_id = _property_id(tool_context)
+    hold_id = _hold_id(tool_context, create=True)
+    if not create_slot_hold(date, time_slot, hold_id, property_id=property_id):
+        return {
+            "error": f"{date} {time_slot}은(는) 이미 예약되었거나 다른 임차인이 선택 중입니다.",
+            "available_slots": get_available_slots(date, hold_id, property_id),
+        }
+    return {"date": date, "time_slot": time_slot, "held_minutes": HOLD_TTL_SECONDS // 60}
 
 
 def schedule_repair(
@@ -89,14 +143,30 @@ def schedule_repair(
     issue_type: IssueType,
     issue_description: str,
     email: str,
+    allow_duplicate: bool = False,
+    tool_context=None,
 ) -> dict:
-    """수리 일정을 예약합니다. 빈 시간대 검증 후 예약을 생성하고 티켓 번호를 발행합니다."""
-    if not book_slot(date, time_slot):
-        return {"error": f"{date} {time_slot}은(는) 이미 예약된 시간대입니다."}
+    """수리 일정을 예약합니다. 빈 시간대 검증 후 예약을 생성하고 티켓 번호를 발행합니다.
 
-    ticket_id = generate_ticket_id(date)
-    repair = create_repair(
-        ticket_id=ticket_id,
+    같은 주소·문제 유형의 진행 중 예약이 있으면 새로 예약하지 않고 기존 예약을 반환합니다.
+    임차인이 별도 예약을 원한다고 확인한 경우에만 allow_duplicate=True로 다시 호출합니다.
+    """
+    try:
+        datetime.date.fromisoformat(date)
+    except ValueError:
+        return {"error": f"날짜 형식이 올바르지 않습니다: {date}. YYYY-MM-DD 형식으로 다시 호출하세요."}
+
+    property_id = _property_id(tool_context)
+    if not allow_duplicate:
+        existing = find_duplicate_repair(address, issue_type, date, property_id)
+        if existing:
+            return {
+                "duplicate": existing,
+                "message": "같은 주소와 문제 유형으로 진행 중인 예약이 이미 있습니다.",
+            }
+
+    hold_id = _hold_id(tool_context)
+    repair = book_repair(
         name=name,
         address=address,
         target_date=date,
@@ -104,8 +174,17 @@ def schedule_repair(
         issue_type=issue_type,
         issue_description=issue_description,
         email=email,
+        hold_id=hold_id,
+        property_id=property_id,
     )
-    notification = _send_notification(email, ticket_id, "scheduled")
+    if repair is None:
+        return {
+            "error": f"{date} {time_slot}은(는) 이미 예약된 시간대입니다.",
+            "available_slots": get_available_slots(date, hold_id, property_id),
+        }
+
+    ticket_id = repair["ticket_id"]
+    notification = _send_notification(email, ticket_id, "scheduled", property_id)
     repair["message"] = (
         f"{name}님, {date} {time_slot}에 수리 기사가 방문할 예정입니다. 티켓 번호: {ticket_id}"
     )
@@ -113,21 +192,33 @@ def schedule_repair(
     return repair
 
 
-def check_repair_status(ticket_id: str) -> dict:
+def check_repair_status(ticket_id: str, tool_context=None) -> dict:
     """티켓 번호로 수리 예약 상태를 조회합니다."""
-    repair = get_repair(ticket_id)
+    repair = get_repair(ticket_id, _property_id(tool_context))
     if not repair:
         return {"error": f"티켓 번호 {ticket_id}에 해당하는 예약을 찾을 수 없습니다."}
     return repair
 
 
-def cancel_repair(ticket_id: str) -> dict:
+def find_repairs(email: str, address: str, tool_context=None) -> dict:
+    """티켓 번호 없이 임차인의 진행 중인 예약을 조회합니다. 예약 시 입력한 이메일과 주소(도로명+상세주소)가 모두 일치해야 합니다."""
+    repairs = find_active_repairs(email, address, property_id=_property_id(tool_context))
+    if not repairs:
+        return {
+            "repairs": [],
+            "message": "입력하신 이메일과 주소로 진행 중인 예약을 찾을 수 없습니다.",
+        }
+    return {"repairs": repairs}
+
+
+def cancel_repair(ticket_id: str, tool_context=None) -> dict:
     """예약을 취소합니다. 티켓 번호로 예약을 찾아 취소하고 해당 시간대를 복구합니다."""
-    result = cancel_repair_record(ticket_id)
+    property_id = _property_id(tool_context)
+    result = cancel_repair_record(ticket_id, property_id)
     if "error" not in result:
         email = result.get("email", "")
         if email:
-            notification = _send_notification(email, ticket_id, "cancelled")
+            notification = _send_notification(email, ticket_id, "cancelled", property_id)
             result["email_status"] = notification.get("status", "skipped")
         result["message"] = f"티켓 {ticket_id} 예약이 취소되었습니다."
     return result
@@ -161,6 +252,41 @@ def _build_email_body(notification_type: str, repair: dict) -> tuple[str, str]:
             f"변경/취소가 필요하시면 KindredPM 고객센터(02-1234-5678)로 연락해주세요.\n\n"
             f"감사합니다.\nKindredPM 유지보수팀"
         )
+    elif notification_type == "reminder":
+        subject = f"[KindredPM] 방문 일정 안내 - {ticket_id}"
+        body = (
+            f"{repair['name']}님, 안녕하세요.\n"
+            f"예약하신 KindredPM 유지보수 방문 일정을 다시 안내드립니다.\n\n"
+            f"■ 티켓 번호: {ticket_id}\n"
+            f"■ 문제 유형: {issue_kr}\n"
+            f"■ 방문 일시: {repair['date']} {repair['time_slot']}\n"
+            f"■ 방문 주소: {repair['address']}\n\n"
+            f"방문 시간에 현장 접근이 가능하도록 준비 부탁드립니다.\n"
+            f"변경/취소가 필요하시면 KindredPM 고객센터(02-1234-5678)로 연락해주세요.\n\n"
+            f"감사합니다.\nKindredPM 유지보수팀"
+        )
+    elif notification_type == "rescheduled":
+        # repair["changes"]: 한 임차인의 변경된 예약 목록 (previous_date/previous_time_slot 포함)
+        changes = repair["changes"]
+        subject = f"[KindredPM] 방문 일정 변경 안내 - {ticket_id}"
+        if len(changes) > 1:
+            subject += f" 외 {len(changes) - 1}건"
+        sections = "\n\n".join(
+            f"■ 티켓 번호: {change['ticket_id']}\n"
+            f"■ 문제 유형: {ISSUE_TYPE_KR.get(change['issue_type'], '시설 문제')}\n"
+            f"■ 변경 전 일시: {change['previous_date']} {change['previous_time_slot']}\n"
+            f"■ 변경 후 일시: {change['date']} {change['time_slot']}\n"
+            f"■ 방문 주소: {change['address']}"
+            for change in changes
+        )
+        body = (
+            f"{repair['name']}님, 안녕하세요.\n"
+            f"수리 기사 일정 사정으로 KindredPM 유지보수 방문 일정이 변경되었습니다.\n"
+            f"불편을 드려 죄송합니다.\n\n"
+            f"{sections}\n\n"
+            f"변경된 일정이 어려우시면 KindredPM 고객센터(02-1234-5678)로 연락해주세요.\n\n"
+            f"감사합니다.\nKindredPM 유지보수팀"
+        )
     else:
         subject = f"[KindredPM] 예약 취소 확인 - {ticket_id}"
         body = (
@@ -175,9 +301,11 @@ def _build_email_body(notification_type: str, repair: dict) -> tuple[str, str]:
     return subject, body
 
 
-def _send_notification(email: str, ticket_id: str, notification_type: str) -> dict:
+def _send_notification(
+    email: str, ticket_id: str, notification_type: str, property_id: str = DEFAULT_PROPERTY
+) -> dict:
     """예약 확인/취소 이메일을 발송합니다. SMTP 미설정 시 시뮬레이션으로 폴백합니다."""
-    repair = get_repair(ticket_id)
+    repair = get_repair(ticket_id, property_id)
     if not repair:
         return {"status": "skipped"}
 
@@ -187,6 +315,10 @@ def _send_notification(email: str, ticket_id: str, notification_type: str) -> di
     smtp_pass = os.environ.get("GMAIL_APP_PASSWORD", "")
 
     if smtp_user and smtp_pass:
+        # smtplib은 ssl·socket까지 끌고 오므로 실제 발송할 때만 import합니다.
+        import smtplib
+        from email.mime.text import MIMEText
+
         try:
             msg = MIMEText(body, "plain", "utf-8")
             msg["Subject"] = subject
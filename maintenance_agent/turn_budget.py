@@ -0,0 +1,346 @@
+"""턴 단위 지연 예산: 재시도, 지터 백오프, 헤징.
+
+한 턴의 모델 호출을 프로세스 공용 이벤트 루프(백그라운드 스레드)에서 실행하고, 첫
+이벤트(TTFT)가 도착하기 전까지만 재시도/헤징을 허용합니다. 각 시도는 첫 이벤트를 내보낸 뒤 채택(claim)될 때까지 다음 단계로
+진행하지 않으므로, 채택되지 않은 시도는 툴(schedule_repair 등)을 실행하지 못합니다.
+
+채택된 시도도 남은 예산이 tool_reserve_s보다 적으면 툴을 실행하지 않고 멈춥니다. 툴 실행 중에 예산을
+소진하면 TurnBudgetExceeded.tools_in_flight에 실행 중이던 툴 이름이 담기고, fallback_message는
+예약·취소가 이미 반영되었을 수 있다고 안내합니다.
+"""
+
+import asyncio
+import functools
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+FALLBACK_MESSAGE = (
+    "죄송합니다, 응답이 지연되고 있습니다. 잠시 후 다시 시도해주시거나 "
+    "고객센터(02-1234-5678)로 연락해주시면 빠르게 도와드리겠습니다."
+)
+
+# 툴 실행 도중 예산을 소진한 경우: 재요청으로 중복 예약·취소가 생기지 않도록 먼저 조회를 권합니다.
+FALLBACK_TOOL_MESSAGE = (
+    "죄송합니다, 응답이 지연되어 처리 결과를 확인하지 못했습니다. 요청하신 예약·취소가 이미 "
+    "반영되었을 수 있으니, 다시 요청하시기 전에 \"내 예약 확인\"으로 먼저 확인해주세요. "
+    "고객센터(02-1234-5678)로 연락해주셔도 됩니다."
+)
+
+
+@dataclass(frozen=True)
+class TurnPolicy:
+    """턴 예산 정책. hedge_after_s가 None이면 헤징하지 않습니다."""
+
+    turn_budget_s: float = 90.0
+    max_retries: int = 2
+    backoff_base_s: float = 0.5
+    backoff_cap_s: float = 8.0
+    hedge_after_s: float | None = None
+    # 남은 예산이 이보다 적으면 툴을 실행하지 않습니다 (툴 실행 + 툴 결과에 대한 모델 응답 시간).
+    tool_reserve_s: float = 10.0
+
+
+class TurnBudgetExceeded(Exception):
+    """턴 예산을 모두 소진했거나 재시도 가능한 시도가 남지 않았을 때 발생합니다.
+
+    tools_in_flight: 예산 소진 시점에 실행 중이라 결과를 알 수 없는 툴 이름 목록.
+    """
+
+    def __init__(self, message: str, tools_in_flight: list[str] | None = None):
+        super().__init__(message)
+        self.tools_in_flight = tools_in_flight or []
+
+
+def fallback_message(exc: BaseException) -> str:
+    """턴 실패 시 사용자에게 보여줄 안내 문구를 반환합니다."""
+    if getattr(exc, "tools_in_flight", None):
+        return FALLBACK_TOOL_MESSAGE
+    return FALLBACK_MESSAGE
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def shared_loop() -> asyncio.AbstractEventLoop:
+    """프로세스 공용 이벤트 루프를 반환합니다. 처음 호출 시 데몬 스레드에서 시작합니다.
+
+    모델 클라이언트의 async HTTP 세션은 이벤트 루프별로 만들어지므로, 시도마다 새 루프를 쓰면
+    매 턴 연결과 TLS 핸드셰이크를 다시 합니다. 모든 시도와 워밍업을 이 루프에서 실행합니다.
+    모든 세션이 이 루프를 공유하므로 블로킹 툴은 off_loop로 감싸 루프 밖에서 실행합니다.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="kpm-model-loop", daemon=True).start()
+            _loop = loop
+    return _loop
+
+
+def run_coroutine(coro, timeout: float | None = None):
+    """공용 이벤트 루프에서 coro를 실행하고 결과를 기다립니다."""
+    return asyncio.run_coroutine_threadsafe(coro, shared_loop()).result(timeout)
+
+
+def off_loop(fn):
+    """동기 툴 fn을 스레드 풀에서 실행하는 async 툴로 감쌉니다.
+
+    ADK는 동기 툴을 이벤트 루프 위에서 그대로 호출하므로, 공용 루프에서는 한 세션의 SQLite 락 대기나
+    SMTP 발송이 다른 모든 세션의 스트리밍·채택 대기·keepalive를 멈춥니다. 시그니처와 docstring은
+    functools.wraps로 유지되어 툴 선언과 tool_context 주입은 그대로입니다.
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _transport_errors() -> tuple[type[BaseException], ...]:
+    """설치된 HTTP 클라이언트의 전송 계층 예외 타입을 모읍니다.
+
+    google-genai는 httpx(동기)와 aiohttp(비동기)를 쓰며, 연결 끊김·읽기 타임아웃은
+    상태 코드 없이 이 예외들로 올라옵니다. 시작 시간을 늘리지 않도록 판별 시점에 가져옵니다.
+    """
+    errors: list[type[BaseException]] = []
+    try:
+        import httpx
+
+        errors.append(httpx.TransportError)
+    except ImportError:
+        pass
+    try:
+        import aiohttp
+
+        errors.append(aiohttp.ClientError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """일시적 오류(네트워크, 타임아웃, 429/5xx)인지 판별합니다."""
+    if isinstance(exc, (ConnectionError, TimeoutError) + _transport_errors()):
+        return True
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code in RETRYABLE_STATUS_CODES
+
+
+def backoff_delay(retry: int, policy: TurnPolicy) -> float:
+    """full jitter 지수 백오프 지연(초)을 반환합니다."""
+    return random.uniform(0, min(policy.backoff_cap_s, policy.backoff_base_s * 2**retry))
+
+
+def _parts(event) -> list:
+    content = getattr(event, "content", None)
+    return (getattr(content, "parts", None) or []) if content else []
+
+
+def tool_calls(event) -> list[str]:
+    """이벤트가 요청하는 툴 이름 목록. 부분(partial) 이벤트의 호출은 실행되지 않으므로 제외합니다."""
+    if getattr(event, "partial", False):
+        return []
+    return [part.function_call.name for part in _parts(event) if getattr(part, "function_call", None)]
+
+
+def has_tool_response(event) -> bool:
+    return any(getattr(part, "function_response", None) for part in _parts(event))
+
+
+class _Attempt:
+    """모델 호출 한 번. 공용 이벤트 루프에서 async 이벤트 스트림을 소비합니다.
+
+    ADK는 툴 호출 이벤트를 내보낸 뒤 스트림이 다시 진행될 때 툴을 실행하므로, 툴 호출 이벤트 다음에
+    스트림을 진행하기 전에 남은 예산을 확인합니다. tools_in_flight는 실행을 허용했지만 아직 응답
+    이벤트가 오지 않은 툴입니다.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        stream_factory,
+        outbox: queue.Queue,
+        deadline: float,
+        tool_reserve_s: float = 0.0,
+    ):
+        self.index = index
+        self._stream_factory = stream_factory
+        self._outbox = outbox
+        self._tool_deadline = deadline - tool_reserve_s
+        self.claimed = threading.Event()
+        self.cancelled = threading.Event()
+        self.tools_in_flight: list[str] = []
+
+    def start(self):
+        future = asyncio.run_coroutine_threadsafe(self._drain(), shared_loop())
+        future.add_done_callback(self._finished)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _finished(self, future):
+        try:
+            future.result()
+            self._outbox.put((self, "done", None))
+        except BaseException as exc:
+            self._outbox.put((self, "error", exc))
+
+    async def _drain(self):
+        stream = self._stream_factory()
+        try:
+            first = True
+            async for event in stream:
+                if self.cancelled.is_set():
+                    break
+                self._outbox.put((self, "event", event))
+                if first:
+                    first = False
+                    # 채택 전에는 다음 단계(툴 실행 포함)로 진행하지 않습니다.
+                    while not self.claimed.is_set() and not self.cancelled.is_set():
+                        await asyncio.sleep(0.02)
+                if self.cancelled.is_set():
+                    break
+                if has_tool_response(event):
+                    self.tools_in_flight = []
+                calls = tool_calls(event)
+                if calls:
+                    if time.monotonic() >= self._tool_deadline:
+                        raise TurnBudgetExceeded("툴 실행 전에 턴 예산을 소진했습니다.")
+                    self.tools_in_flight = calls
+        finally:
+            await stream.aclose()
+
+
+class BudgetedTurn:
+    """턴 예산 안에서 이벤트를 스트리밍합니다.
+
+    stream_factory(attempt_index)는 해당 시도의 async 이벤트 스트림을 반환합니다.
+    반복이 끝나면 winner에 채택된 시도 번호가, ttft_s에 턴 시작부터 채택된 첫 이벤트까지의
+    시간(초)이 기록됩니다.
+    """
+
+    def __init__(
+        self,
+        stream_factory: Callable[[int], AsyncIterator],
+        policy: TurnPolicy | None = None,
+    ):
+        self._stream_factory = stream_factory
+        self.policy = policy or TurnPolicy()
+        self.winner: int | None = None
+        self.ttft_s: float | None = None
+        self.attempts = 0
+
+    def _launch(self, outbox: queue.Queue, racing: list, deadline: float) -> _Attempt:
+        index = self.attempts
+        attempt = _Attempt(
+            index,
+            lambda: self._stream_factory(index),
+            outbox,
+            deadline,
+            self.policy.tool_reserve_s,
+        )
+        self.attempts += 1
+        racing.append(attempt)
+        attempt.start()
+        return attempt
+
+    def __iter__(self):
+        policy = self.policy
+        outbox: queue.Queue = queue.Queue()
+        racing: list[_Attempt] = []
+        started = time.monotonic()
+        deadline = started + policy.turn_budget_s
+        retries = 0
+        retry_at = None
+        hedged = policy.hedge_after_s is None
+
+        self._launch(outbox, racing, deadline)
+        hedge_at = time.monotonic() + (policy.hedge_after_s or 0)
+
+        # --- 1단계: 첫 이벤트까지 재시도/헤징 ---
+        winner = None
+        first_event = None
+        while winner is None:
+            now = time.monotonic()
+            if now >= deadline:
+                for attempt in racing:
+                    attempt.cancel()
+                raise TurnBudgetExceeded("첫 응답 전에 턴 예산을 소진했습니다.")
+            if retry_at is not None and now >= retry_at:
+                retry_at = None
+                self._launch(outbox, racing, deadline)
+            if not hedged and now >= hedge_at:
+                hedged = True
+                self._launch(outbox, racing, deadline)
+
+            wake_at = [deadline]
+            if retry_at is not None:
+                wake_at.append(retry_at)
+            if not hedged:
+                wake_at.append(hedge_at)
+            try:
+                attempt, kind, payload = outbox.get(
+                    timeout=max(0.0, min(wake_at) - now)
+                )
+            except queue.Empty:
+                continue
+            if attempt not in racing:
+                continue
+
+            if kind == "event":
+                winner, first_event = attempt, payload
+            elif kind == "done":
+                winner = attempt
+            else:
+                racing.remove(attempt)
+                if not is_retryable(payload):
+                    for other in racing:
+                        other.cancel()
+                    raise payload
+                if racing or retry_at is not None:
+                    continue
+                if retries >= policy.max_retries:
+                    raise TurnBudgetExceeded("재시도 횟수를 모두 소진했습니다.") from payload
+                retry_at = time.monotonic() + backoff_delay(retries, policy)
+                retries += 1
+
+        for attempt in racing:
+            if attempt is not winner:
+                attempt.cancel()
+        winner.claimed.set()
+        self.winner = winner.index
+        self.ttft_s = time.monotonic() - started
+
+        # --- 2단계: 채택된 시도 스트리밍 (부분 출력 이후에는 재시도하지 않음) ---
+        if first_event is None:
+            return
+        try:
+            yield first_event
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise TurnBudgetExceeded(
+                        "응답 도중 턴 예산을 소진했습니다.", list(winner.tools_in_flight)
+                    )
+                try:
+                    attempt, kind, payload = outbox.get(timeout=deadline - now)
+                except queue.Empty:
+                    continue
+                if attempt is not winner:
+                    continue
+                if kind == "event":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    raise payload
+        finally:
+            winner.cancel()
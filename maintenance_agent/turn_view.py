@@ -0,0 +1,122 @@
+"""한 턴의 에이전트 이벤트 스트림 렌더링.
+
+이벤트를 사고 과정(thinking) → 툴 호출/응답 → 응답 텍스트 페이즈로 나눠 화면에 그리고, 히스토리
+재생용 parts 목록을 만듭니다. 화면 출력은 ui 객체(streamlit 모듈 또는 replay.HeadlessUI)를 통해서만
+하므로 녹화된 세션을 모델 호출 없이 같은 코드로 재생할 수 있습니다.
+"""
+
+from collections import deque
+
+
+def render_tool(ui, tool: dict):
+    """툴 호출/응답을 status 컨테이너로 렌더링합니다."""
+    import json  # 첫 화면 전 import 예산 밖으로 미룹니다.
+
+    with ui.status(f"🔧 {tool['name']}", state="complete"):
+        if tool["args"]:
+            ui.code(
+                json.dumps(tool["args"], ensure_ascii=False, indent=2),
+                language="json",
+            )
+        if tool["response"]:
+            ui.divider()
+            ui.caption("결과")
+            ui.code(
+                json.dumps(tool["response"], ensure_ascii=False, indent=2),
+                language="json",
+            )
+
+
+class TurnView:
+    """이벤트를 받아 페이즈 전환을 처리합니다. finish()가 히스토리용 parts를 반환합니다.
+
+    function_response는 도착 순서대로 pending_calls의 가장 오래된 function_call과 짝짓습니다.
+    """
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.parts: list[dict] = []
+        self._thinking_status = None
+        self._thinking_md = None
+        self._thinking_text = ""
+        self._text_el = None
+        self._text_content = ""
+        self._pending_calls = deque()
+
+    def _close_thinking(self):
+        if self._thinking_status is None:
+            return
+        self._thinking_status.update(label="💭 사고 과정", state="complete", expanded=False)
+        if self._thinking_text:
+            self.parts.append({"type": "thinking", "text": self._thinking_text})
+        self._thinking_status = None
+        self._thinking_md = None
+        self._thinking_text = ""
+
+    def _close_text(self):
+        if self._text_el is None:
+            return
+        self.parts.append({"type": "text", "text": self._text_content})
+        self._text_el = None
+        self._text_content = ""
+
+    def handle(self, event):
+        if not event.content or not event.content.parts:
+            return
+
+        is_partial = getattr(event, "partial", False)
+
+        for part in event.content.parts:
+            if getattr(part, "thought", False) and part.text and is_partial:
+                # --- Thinking 스트리밍 ---
+                self._close_text()
+                if self._thinking_md is None:
+                    self._thinking_status = self.ui.status("사고 중...", expanded=True)
+                    self._thinking_md = self._thinking_status.empty()
+                    self._thinking_text = ""
+                self._thinking_text += part.text
+                self._thinking_md.markdown(self._thinking_text)
+
+            elif part.function_call and not is_partial:
+                # --- 툴 호출 ---
+                self._close_thinking()
+                self._close_text()
+                self._pending_calls.append(part.function_call)
+
+            elif part.function_response and not is_partial:
+                # --- 툴 응답 ---
+                fr = part.function_response
+                matched_call = self._pending_calls.popleft() if self._pending_calls else None
+                call_name = matched_call.name if matched_call else fr.name
+                call_args = dict(matched_call.args) if matched_call and matched_call.args else {}
+                response_data = dict(fr.response) if fr.response else {}
+                tool_data = {
+                    "type": "tool",
+                    "name": call_name,
+                    "args": call_args,
+                    "response": response_data,
+                }
+                self.parts.append(tool_data)
+                render_tool(self.ui, tool_data)
+
+            elif part.text and not getattr(part, "thought", False) and is_partial:
+                # --- 응답 텍스트 스트리밍 ---
+                self._close_thinking()
+                if self._text_el is None:
+                    self._text_el = self.ui.empty()
+                self._text_content += part.text
+                self._text_el.markdown(self._text_content)
+
+    def fail(self, message: str):
+        """진행 중인 응답 텍스트를 마감하고 message(폴백 안내)를 응답으로 표시합니다."""
+        self._close_text()
+        self._text_content = message
+        self.ui.markdown(message)
+
+    def finish(self) -> list[dict]:
+        """미완료 페이즈를 정리하고 parts를 반환합니다."""
+        self._close_thinking()
+        if self._text_content:
+            self.parts.append({"type": "text", "text": self._text_content})
+            self._text_content = ""
+        return self.parts
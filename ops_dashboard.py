@@ -0,0 +1,90 @@
+"""운영 대시보드. 임차인용 채팅 앱(app.py)과 분리된 별도 Streamlit 앱입니다.
+
+채팅 앱의 pages/에 두면 임차인 화면의 내비게이션에 노출되므로, 내부망에서 따로 실행합니다:
+    streamlit run ops_dashboard.py --server.port 8502
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from maintenance_agent.db import db_path, list_properties
+from maintenance_agent.stats import get_portfolio_summary
+from maintenance_agent.tools import ISSUE_TYPE_KR
+
+st.set_page_config(
+    page_title="KindredPM 운영 대시보드",
+    page_icon="📊",
+    layout="wide",
+)
+
+st.title("운영 대시보드")
+st.caption("예약·취소 시점에 증분 갱신되는 집계 테이블을 조회합니다.")
+
+ALL_PROPERTIES = "전체 건물"
+properties = [p for p in list_properties() if db_path(p).exists()]
+selected = st.selectbox("건물", [ALL_PROPERTIES, *properties])
+
+today = date.today()
+period = st.date_input(
+    "기간",
+    value=(today - timedelta(days=30), today + timedelta(days=7)),
+)
+if len(period) != 2:
+    # 시작일만 선택된 상태
+    st.stop()
+start, end = period
+summary = get_portfolio_summary(
+    start.isoformat(),
+    end.isoformat(),
+    None if selected == ALL_PROPERTIES else [selected],
+)
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("예약", f"{summary['booked']:,}건")
+col2.metric("취소", f"{summary['cancelled']:,}건")
+col3.metric("취소율", f"{summary['cancellation_rate']:.1%}")
+col4.metric("슬롯 가동률", f"{summary['slot_utilization']:.1%}")
+
+if selected == ALL_PROPERTIES and len(summary["by_property"]) > 1:
+    st.subheader("건물별 지표")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {
+                    "건물": property_id,
+                    "예약": part["booked"],
+                    "취소율": part["cancellation_rate"],
+                    "슬롯 가동률": part["slot_utilization"],
+                }
+                for property_id, part in summary["by_property"].items()
+            ]
+        ).set_index("건물")
+    )
+
+if summary["bookings"]:
+    bookings = pd.DataFrame(summary["bookings"])
+    bookings["issue_type"] = bookings["issue_type"].map(ISSUE_TYPE_KR).fillna(
+        bookings["issue_type"]
+    )
+
+    st.subheader("일자·유형별 예약")
+    st.bar_chart(
+        bookings.pivot_table(
+            index="date", columns="issue_type", values="booked", fill_value=0
+        )
+    )
+
+    st.subheader("유형별 취소율")
+    by_type = bookings.groupby("issue_type")[["booked", "cancelled"]].sum()
+    by_type["취소율"] = (by_type["cancelled"] / by_type["booked"]).round(3)
+    st.dataframe(by_type.rename(columns={"booked": "예약", "cancelled": "취소"}))
+else:
+    st.info("선택한 기간에 예약이 없습니다.")
+
+if summary["slot_usage"]:
+    st.subheader("일자별 슬롯 가동률")
+    usage = pd.DataFrame(summary["slot_usage"]).set_index("date")
+    usage["가동률"] = usage["booked_slots"] / usage["total_slots"]
+    st.line_chart(usage["가동률"])
@@ -0,0 +1,19 @@
+"""녹화 픽스처를 replay_fixture로 재생해 TurnView의 툴 짝짓기와 parts를 검사합니다."""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("google.adk.events")
+
+from maintenance_agent.replay import replay_fixture  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def test_replay_thinking_two_tools_and_text():
+    result = replay_fixture(FIXTURES / "sink_leak_two_tools.jsonl")
+    assert result["problems"] == []
+    assert result["by_kind"]["thinking"]["count"] == 4
+    assert result["by_kind"]["tool_response"]["count"] == 1
+    assert result["render_calls"]["code"] == 4
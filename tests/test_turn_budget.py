@@ -0,0 +1,226 @@
+"""turn_budget의 재시도·헤징·채택·툴 실행 예산을 가짜 스트림으로 검사합니다."""
+
+import asyncio
+import inspect
+import sys
+import time
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from maintenance_agent.turn_budget import (
+    FALLBACK_MESSAGE,
+    FALLBACK_TOOL_MESSAGE,
+    BudgetedTurn,
+    TurnBudgetExceeded,
+    TurnPolicy,
+    fallback_message,
+    is_retryable,
+    off_loop,
+    run_coroutine,
+)
+
+
+def text_event(text: str):
+    return SimpleNamespace(
+        partial=True,
+        content=SimpleNamespace(parts=[SimpleNamespace(text=text, function_call=None)]),
+    )
+
+
+def call_event(name: str):
+    call = SimpleNamespace(name=name, args={})
+    return SimpleNamespace(
+        partial=False,
+        content=SimpleNamespace(parts=[SimpleNamespace(text=None, function_call=call)]),
+    )
+
+
+def response_event(name: str):
+    response = SimpleNamespace(name=name, response={"ok": True})
+    return SimpleNamespace(
+        partial=False,
+        content=SimpleNamespace(
+            parts=[SimpleNamespace(text=None, function_call=None, function_response=response)]
+        ),
+    )
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+def policy(**overrides) -> TurnPolicy:
+    values = {
+        "turn_budget_s": 2.0,
+        "backoff_base_s": 0.01,
+        "backoff_cap_s": 0.02,
+        "tool_reserve_s": 0.0,
+    }
+    values.update(overrides)
+    return TurnPolicy(**values)
+
+
+def texts(events) -> list[str]:
+    return [event.content.parts[0].text for event in events]
+
+
+def test_retries_transient_error_before_first_event():
+    async def stream(index):
+        if index == 0:
+            raise Unavailable()
+        yield text_event("안녕하세요")
+
+    turn = BudgetedTurn(stream, policy())
+    assert texts(turn) == ["안녕하세요"]
+    assert turn.winner == 1
+    assert turn.attempts == 2
+    assert turn.ttft_s is not None
+
+
+def test_non_retryable_error_is_raised():
+    async def stream(index):
+        raise ValueError("bad request")
+        yield
+
+    turn = BudgetedTurn(stream, policy())
+    with pytest.raises(ValueError):
+        list(turn)
+    assert turn.attempts == 1
+
+
+def test_http_transport_error_is_retryable(monkeypatch):
+    try:
+        import httpx
+    except ImportError:
+        httpx = ModuleType("httpx")
+        httpx.TransportError = type("TransportError", (Exception,), {})
+        monkeypatch.setitem(sys.modules, "httpx", httpx)
+
+    class ReadTimeout(httpx.TransportError):
+        pass
+
+    assert is_retryable(ReadTimeout("read timed out"))
+    assert not is_retryable(ValueError("bad request"))
+
+    async def stream(index):
+        if index == 0:
+            raise ReadTimeout("read timed out")
+        yield text_event("안녕하세요")
+
+    turn = BudgetedTurn(stream, policy())
+    assert texts(turn) == ["안녕하세요"]
+    assert turn.attempts == 2
+
+
+def test_gives_up_after_max_retries():
+    async def stream(index):
+        raise Unavailable()
+        yield
+
+    turn = BudgetedTurn(stream, policy(max_retries=2))
+    with pytest.raises(TurnBudgetExceeded):
+        list(turn)
+    assert turn.attempts == 3
+
+
+def test_budget_exhausted_before_first_event():
+    async def stream(index):
+        await asyncio.sleep(5)
+        yield text_event("늦은 응답")
+
+    with pytest.raises(TurnBudgetExceeded) as info:
+        list(BudgetedTurn(stream, policy(turn_budget_s=0.2)))
+    assert fallback_message(info.value) == FALLBACK_MESSAGE
+
+
+def test_hedge_wins_and_loser_never_runs_tools():
+    executed = []
+
+    async def stream(index):
+        if index == 0:
+            await asyncio.sleep(0.3)
+        yield call_event("schedule_repair")
+        executed.append(index)
+        yield response_event("schedule_repair")
+        yield text_event(f"완료 {index}")
+
+    turn = BudgetedTurn(stream, policy(hedge_after_s=0.05))
+    events = list(turn)
+    time.sleep(0.4)  # 진 시도가 첫 이벤트를 낼 시간
+    assert turn.winner == 1
+    assert executed == [1]
+    assert events[-1].content.parts[0].text == "완료 1"
+
+
+def test_tool_not_started_within_reserve():
+    executed = []
+
+    async def stream(index):
+        yield text_event("예약하겠습니다")
+        await asyncio.sleep(0.3)
+        yield call_event("schedule_repair")
+        executed.append(index)
+        yield response_event("schedule_repair")
+
+    turn = BudgetedTurn(stream, policy(turn_budget_s=1.0, tool_reserve_s=0.8))
+    with pytest.raises(TurnBudgetExceeded) as info:
+        list(turn)
+    time.sleep(0.1)
+    assert executed == []
+    assert info.value.tools_in_flight == []
+    assert fallback_message(info.value) == FALLBACK_MESSAGE
+
+
+def test_budget_exhausted_while_tool_runs():
+    async def stream(index):
+        yield call_event("schedule_repair")
+        await asyncio.sleep(1.0)  # 툴 실행
+        yield response_event("schedule_repair")
+
+    with pytest.raises(TurnBudgetExceeded) as info:
+        list(BudgetedTurn(stream, policy(turn_budget_s=0.3)))
+    assert info.value.tools_in_flight == ["schedule_repair"]
+    assert fallback_message(info.value) == FALLBACK_TOOL_MESSAGE
+
+
+def test_finished_tool_is_not_reported_in_flight():
+    async def stream(index):
+        yield call_event("check_available_slots")
+        yield response_event("check_available_slots")
+        await asyncio.sleep(1.0)
+        yield text_event("늦은 응답")
+
+    with pytest.raises(TurnBudgetExceeded) as info:
+        list(BudgetedTurn(stream, policy(turn_budget_s=0.3)))
+    assert info.value.tools_in_flight == []
+
+
+def test_off_loop_tool_does_not_block_shared_loop():
+    def blocking_tool(ticket_id: str, tool_context=None) -> dict:
+        """예약을 취소합니다."""
+        time.sleep(0.3)  # SQLite 락 대기·SMTP 발송
+        return {"ticket_id": ticket_id}
+
+    tool = off_loop(blocking_tool)
+    assert inspect.iscoroutinefunction(tool)
+    assert inspect.signature(tool) == inspect.signature(blocking_tool)
+    assert tool.__name__ == "blocking_tool" and tool.__doc__ == blocking_tool.__doc__
+
+    async def scenario():
+        ticks = 0
+
+        async def other_session():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(other_session())
+        result = await tool("KPM-20261021-001")
+        task.cancel()
+        return result, ticks
+
+    result, ticks = run_coroutine(scenario())
+    assert result == {"ticket_id": "KPM-20261021-001"}
+    assert ticks >= 10